@@ -6,7 +6,7 @@ Determines a probable order of multiple
 file snapshots of the same source code based only on the text content.
 
 Usage:
-    python infer_version_order.py [path_to_folder]
+    python infer_version_order.py [path_to_folder] [difflib|minhash] [--incremental]
 
 Idea
 -----
@@ -19,8 +19,22 @@ Idea
    the *highest* similarity (smallest d) to the current one.
 This roughly corresponds to an approximation of the "shortest path"
 through all versions (TSP heuristic).
+5. The path is improved with 2-opt/Or-opt moves under a time budget,
+   starting from several candidates in parallel (see pathOrder.py).
+
+The "minhash" backend compares line hashes instead of characters:
+MinHash signatures and locality-sensitive hashing only propose candidate
+neighbours, and the final path is refined with an exact line diff.
+
+Exact similarities are cached in <folder>/.similarity_cache.sqlite by the
+SHA-1 of both file contents, so later runs only compare new or changed
+files. With --incremental, new snapshots are inserted into the stored order.
 """
-import sys, glob, difflib, itertools, statistics, pathlib
+import sys, glob, difflib, itertools, statistics, pathlib, os, zlib, hashlib, sqlite3
+from collections import defaultdict
+import numpy as np
+from pathOrder import multi_start_order
+from concurrent.futures import ProcessPoolExecutor
 
 def load_files(folder: str):
     files = sorted(pathlib.Path(folder).glob("*.py"))
@@ -28,9 +42,87 @@ def load_files(folder: str):
         raise SystemExit(f"Keine *.py-Dateien in {folder} gefunden.")
     return files, {f: f.read_text(encoding="utf-8", errors="ignore") for f in files}
 
-def pairwise_similarity(files, texts):
-    sim = {(a, b): difflib.SequenceMatcher(None, texts[a], texts[b]).ratio()
-           for a, b in itertools.permutations(files, 2) if a != b}
+def content_sha1(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class SimilarityCache:
+    # Persistente Ähnlichkeiten in SQLite, Schlüssel: SHA-1 beider Dateiinhalte.
+    # Zusätzlich wird die zuletzt berechnete Reihenfolge gespeichert.
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS similarity ("
+                          "sha_a TEXT, sha_b TEXT, value REAL, PRIMARY KEY (sha_a, sha_b))")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS path_order ("
+                          "position INTEGER PRIMARY KEY, sha TEXT)")
+
+    @staticmethod
+    def key(sha_a, sha_b):
+        return (sha_a, sha_b) if sha_a <= sha_b else (sha_b, sha_a)
+
+    def lookup(self, shas):
+        # Nur die gesuchten SHAs lesen: temporäre Tabelle, Join über den Primärschlüssel
+        # (CROSS JOIN legt in SQLite die Reihenfolge fest: wanted treibt den Index-Zugriff)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (sha TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", [(sha,) for sha in set(shas)])
+        rows = self.conn.execute("SELECT s.sha_a, s.sha_b, s.value FROM wanted AS a "
+                                 "CROSS JOIN similarity AS s ON s.sha_a = a.sha "
+                                 "JOIN wanted AS b ON s.sha_b = b.sha")
+        return {(a, b): value for a, b, value in rows}
+
+    def store(self, items):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO similarity VALUES (?, ?, ?)",
+                                  [(*self.key(a, b), value) for a, b, value in items])
+
+    def load_order(self):
+        return [sha for (sha,) in self.conn.execute("SELECT sha FROM path_order ORDER BY position")]
+
+    def save_order(self, shas):
+        with self.conn:
+            self.conn.execute("DELETE FROM path_order")
+            self.conn.executemany("INSERT INTO path_order VALUES (?, ?)", list(enumerate(shas)))
+
+    def close(self):
+        self.conn.close()
+
+_worker_texts = None
+
+def _init_worker(texts):
+    global _worker_texts
+    _worker_texts = texts
+
+def _exact_ratios(pairs):
+    return [difflib.SequenceMatcher(None, _worker_texts[i], _worker_texts[j]).ratio()
+            for i, j in pairs]
+
+def pairwise_similarity(files, texts, processes=None, chunk_size=16, cache=None):
+    # Jedes ungeordnete Paar nur einmal, verteilt auf einen Prozess-Pool.
+    # Mit cache werden bekannte exakte Werte übernommen und neue gespeichert.
+    contents = [texts[f] for f in files]
+    pairs = list(itertools.combinations(range(len(files)), 2))
+    exact = {}
+    if cache is not None:
+        shas = [content_sha1(c) for c in contents]
+        known = cache.lookup(shas)
+        for i, j in pairs:
+            value = known.get(cache.key(shas[i], shas[j]))
+            if value is not None:
+                exact[(i, j)] = value
+    missing = [p for p in pairs if p not in exact]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    chunks = [missing[k:k + chunk_size] for k in range(0, len(missing), chunk_size)]
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(contents,)) as executor:
+        ratios = list(itertools.chain.from_iterable(executor.map(_exact_ratios, chunks)))
+    exact.update(zip(missing, ratios))
+    if cache is not None:
+        cache.store([(shas[i], shas[j], value) for (i, j), value in zip(missing, ratios)])
+
+    sim = {}
+    for (i, j), value in exact.items():
+        sim[(files[i], files[j])] = sim[(files[j], files[i])] = value
     return sim
 
 def greedy_order(files, sim):
@@ -48,10 +140,200 @@ def greedy_order(files, sim):
         current = nxt
     return order, avg
 
-def main(folder="./data"):
+def similarity_matrix(files, sim):
+    n = len(files)
+    matrix = np.ones((n, n))
+    for i, j in itertools.combinations(range(n), 2):
+        matrix[i, j] = matrix[j, i] = sim[(files[i], files[j])]
+    return matrix
+
+def optimized_order(files, sim, n_starts=4, time_limit=1.0, processes=None):
+    # Auf der Distanzmatrix 1 - sim: nächster Nachbar (vektorisiert) von den n_starts
+    # Dateien mit geringstem mittleren sim-Wert, danach 2-opt/Or-opt mit Zeitbudget.
+    # Die Starts laufen parallel; Rückgabe zusätzlich die Pfadkosten (Summe 1 - sim).
+    matrix = similarity_matrix(files, sim)
+    n = len(files)
+    mean_sim = (matrix.sum(axis=1) - 1) / max(n - 1, 1)
+    avg = dict(zip(files, mean_sim))
+    dist = 1 - matrix
+    starts = np.argsort(mean_sim)[:n_starts]
+    path, cost = multi_start_order(dist, starts, time_limit, processes)
+    # älteste Version (geringster mittlerer sim-Wert) an den Anfang
+    if path and mean_sim[path[-1]] < mean_sim[path[0]]:
+        path.reverse()
+    return [files[k] for k in path], avg, cost
+
+# --- MinHash/LSH-Backend: Zeilen statt Zeichen ---
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+def shingle_hashes(text, shingle_size=1):
+    # Hashwerte der Zeilen bzw. von shingle_size aufeinanderfolgenden Zeilen
+    lines = [line.strip() for line in text.splitlines()]
+    shingles = ["\n".join(lines[k:k + shingle_size])
+                for k in range(max(1, len(lines) - shingle_size + 1))]
+    return np.unique(np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64))
+
+def minhash_signatures(hash_sets, num_perm=128, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(hash_sets), num_perm), dtype=np.uint64)
+    for k, hashes in enumerate(hash_sets):
+        x = hashes % np.uint64(MERSENNE_PRIME)
+        signatures[k] = ((x[:, None] * a[None, :] + b) % np.uint64(MERSENNE_PRIME)).min(axis=0)
+    return signatures
+
+def lsh_candidates(signatures, bands=8, max_bucket=50):
+    # Dateien, die in mindestens einem Band übereinstimmen, werden Kandidatenpaare.
+    # Schwelle etwa (1/bands)^(1/rows): 8 Bänder à 16 Zeilen ~ Jaccard 0.88, passend für
+    # Snapshots derselben Datei. Große Buckets nur paarweise mit den nächsten
+    # max_bucket Mitgliedern, damit ein Bucket nicht quadratisch viele Paare liefert.
+    rows = signatures.shape[1] // bands
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for k, sig in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets[sig.tobytes()].append(k)
+        for bucket in buckets.values():
+            if len(bucket) <= max_bucket:
+                candidates.update(itertools.combinations(bucket, 2))
+            else:
+                for pos, k in enumerate(bucket):
+                    candidates.update((k, other) for other in bucket[pos + 1:pos + 1 + max_bucket])
+    return candidates
+
+def line_ratio(lines_a, lines_b):
+    return difflib.SequenceMatcher(None, lines_a, lines_b, autojunk=False).ratio()
+
+def minhash_similarity(files, texts, shingle_size=1, num_perm=128, bands=8, max_neighbours=10):
+    # Geschätzte Jaccard-Ähnlichkeit (Anteil gleicher MinHash-Werte), nur für LSH-Kandidaten;
+    # behalten werden je Datei die max_neighbours ähnlichsten Kandidaten
+    signatures = minhash_signatures([shingle_hashes(texts[f], shingle_size) for f in files], num_perm)
+    values = {(i, j): float(np.mean(signatures[i] == signatures[j]))
+              for i, j in lsh_candidates(signatures, bands)}
+    ranked = defaultdict(list)
+    for (i, j), value in values.items():
+        ranked[i].append((value, j))
+        ranked[j].append((value, i))
+    sim = {}
+    for i, neighbours in ranked.items():
+        for value, j in sorted(neighbours, reverse=True)[:max_neighbours]:
+            sim[(files[i], files[j])] = sim[(files[j], files[i])] = value
+    return sim, signatures
+
+def candidate_greedy_order(files, sim, signatures):
+    # Wie greedy_order, aber nur über LSH-Kandidaten; hat die aktuelle Datei keinen
+    # unbesuchten Kandidaten mehr, entscheidet der Signaturvergleich mit allen übrigen.
+    neighbours = defaultdict(list)
+    for (f, g), value in sim.items():
+        neighbours[f].append((value, g))
+    for f in neighbours:
+        neighbours[f].sort(key=lambda item: item[0], reverse=True)
+    index = {f: k for k, f in enumerate(files)}
+    avg = {}
+    for k, f in enumerate(files):
+        if neighbours[f]:
+            avg[f] = statistics.mean(v for v, _ in neighbours[f])
+        else:
+            # ohne LSH-Kandidaten: Signaturvergleich mit allen übrigen Dateien
+            agreement = (signatures == signatures[k]).mean(axis=1)
+            avg[f] = float(np.delete(agreement, k).mean()) if len(files) > 1 else 1.0
+
+    current = min(avg, key=avg.get)
+    order = [current]
+    visited = {current}
+    while len(order) < len(files):
+        nxt = next((g for _, g in neighbours[current] if g not in visited), None)
+        if nxt is None:
+            remaining = [g for g in files if g not in visited]
+            agreement = (signatures[[index[g] for g in remaining]] == signatures[index[current]]).mean(axis=1)
+            nxt = remaining[int(np.argmax(agreement))]
+        order.append(nxt)
+        visited.add(nxt)
+        current = nxt
+    return order, avg
+
+def refine_order(order, texts, window=4):
+    # Exakte Verfeinerung auf Zeilenebene: Teilstücke des Pfads bis zur Länge window
+    # umdrehen, wenn die Summe der Nachbar-Ähnlichkeiten dadurch steigt.
+    lines = {f: texts[f].splitlines() for f in order}
+    cache = {}
+    def ratio(f, g):
+        key = (f, g) if str(f) < str(g) else (g, f)
+        if key not in cache:
+            cache[key] = line_ratio(lines[key[0]], lines[key[1]])
+        return cache[key]
+
+    order = list(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order)):
+            for j in range(i + 1, min(i + window, len(order))):
+                before = (ratio(order[i - 1], order[i]) if i > 0 else 0) + \
+                         (ratio(order[j], order[j + 1]) if j + 1 < len(order) else 0)
+                after = (ratio(order[i - 1], order[j]) if i > 0 else 0) + \
+                        (ratio(order[i], order[j + 1]) if j + 1 < len(order) else 0)
+                if after > before + 1e-12:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = True
+    return order
+
+def incremental_order(files, texts, cache):
+    # Neue Snapshots an der günstigsten Stelle in die gespeicherte Reihenfolge einfügen,
+    # ohne den ganzen Pfad neu zu berechnen. Ohne gespeicherte Reihenfolge: None.
+    shas = {f: content_sha1(texts[f]) for f in files}
+    by_sha = {}
+    for f in files:
+        by_sha.setdefault(shas[f], f)
+    order = [by_sha[sha] for sha in dict.fromkeys(cache.load_order()) if sha in by_sha]
+    if not order:
+        return None
+    known = cache.lookup(shas.values())
+    new_values = []
+
+    def ratio(f, g):
+        key = cache.key(shas[f], shas[g])
+        if key not in known:
+            known[key] = difflib.SequenceMatcher(None, texts[f], texts[g]).ratio()
+            new_values.append((*key, known[key]))
+        return known[key]
+
+    placed = set(order)
+    for f in files:
+        if f in placed:
+            continue
+        gains = [ratio(f, order[0])] + \
+                [ratio(a, f) + ratio(f, b) - ratio(a, b) for a, b in zip(order, order[1:])] + \
+                [ratio(order[-1], f)]
+        order.insert(max(range(len(gains)), key=gains.__getitem__), f)
+        placed.add(f)
+    cache.store(new_values)
+
+    # ⌀-Ähnlichkeit hier nur zu den Nachbarn im Pfad
+    avg = {}
+    for k, f in enumerate(order):
+        neighbours = order[max(0, k - 1):k] + order[k + 1:k + 2]
+        avg[f] = statistics.mean(ratio(f, g) for g in neighbours) if neighbours else 1.0
+    return order, avg
+
+def main(folder="./data", backend="difflib", incremental=False):
     files, texts = load_files(folder)
-    sim = pairwise_similarity(files, texts)
-    order, avg = greedy_order(files, sim)
+    cache = SimilarityCache(os.path.join(folder, ".similarity_cache.sqlite"))
+    result = incremental_order(files, texts, cache) if incremental else None
+    if result is not None:
+        order, avg = result
+    elif backend == "minhash":
+        sim, signatures = minhash_similarity(files, texts)
+        order, avg = candidate_greedy_order(files, sim, signatures)
+        order = refine_order(order, texts)
+    else:
+        sim = pairwise_similarity(files, texts, cache=cache)
+        order, avg, cost = optimized_order(files, sim)
+        print(f"path cost (Σ 1 - sim): {cost:.4f}")
+    cache.save_order([content_sha1(texts[f]) for f in order])
+    cache.close()
 
     print("⮕ probable order (old → new):")
     for i, f in enumerate(order, 1):
@@ -59,4 +341,7 @@ def main(folder="./data"):
 
 
 if __name__ == "__main__":
-    main(sys.argv[1] if len(sys.argv) > 1 else "./data")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(args[0] if len(args) > 0 else "./data",
+         args[1] if len(args) > 1 else "difflib",
+         incremental="--incremental" in sys.argv)
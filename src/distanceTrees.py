@@ -1,10 +1,17 @@
+import os
+import re
+import hashlib
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from scipy.cluster.hierarchy import linkage, dendrogram
+from scipy.spatial.distance import squareform
+from scipy.sparse import csr_matrix, triu
+from scipy.sparse.csgraph import minimum_spanning_tree, connected_components
+from sklearn.neighbors import kneighbors_graph
 import matplotlib.pyplot as plt
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_distances
 from Levenshtein import distance as levenshtein_distance
-from sklearn.metrics import jaccard_score
 from sklearn.preprocessing import MultiLabelBinarizer
 
 # Beispiel-Sätze
@@ -23,31 +30,244 @@ sentences = [
 
 labels = [f"Satz {i+1}" for i in range(len(sentences))]
 
-# --- Levenshtein Distanzmatrix ---
-lev_matrix = np.array([[levenshtein_distance(a, b) for b in sentences] for a in sentences])
+# Alle Distanzen als komprimierte Vektoren (obere Dreiecksmatrix, Länge n(n-1)/2),
+# wie sie scipy.cluster.hierarchy.linkage direkt erwartet.
 
-# --- Cosine Distanzmatrix (über TF-IDF) ---
-tfidf = TfidfVectorizer().fit_transform(sentences)
-cosine_matrix = cosine_distances(tfidf)
+# --- Levenshtein (nur obere Dreiecksmatrix, zeilenweise parallel) ---
+_worker_sentences = None
 
-# --- Jaccard Distanzmatrix (über Token) ---
-token_sets = [set(s.lower().split()) for s in sentences]
-mlb = MultiLabelBinarizer()
-binary_matrix = mlb.fit_transform(token_sets)
-jaccard_matrix = 1 - np.array([
-    jaccard_score(binary_matrix[i], binary_matrix[j])
-    for i in range(len(sentences)) for j in range(len(sentences))
-]).reshape(len(sentences), len(sentences))
+def _init_worker(texts):
+    global _worker_sentences
+    _worker_sentences = texts
+
+def _levenshtein_rows(rows):
+    texts = _worker_sentences
+    return [(i, [levenshtein_distance(texts[i], texts[j]) for j in range(i + 1, len(texts))])
+            for i in rows]
+
+def levenshtein_condensed(texts, processes=None):
+    n = len(texts)
+    if processes is None:
+        processes = 1 if n < 500 else os.cpu_count() or 1
+    if processes > 1:
+        blocks = [range(k, n, 4 * processes) for k in range(4 * processes)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(texts,)) as executor:
+            results = [row for rows in executor.map(_levenshtein_rows, blocks) for row in rows]
+    else:
+        _init_worker(texts)
+        results = _levenshtein_rows(range(n))
+    condensed = np.zeros(n * (n - 1) // 2)
+    for i, row in results:
+        start = n * i - i * (i + 1) // 2
+        condensed[start:start + len(row)] = row
+    return condensed
+
+# --- Cosine (über TF-IDF) ---
+def cosine_condensed(tfidf):
+    return squareform(cosine_distances(tfidf), checks=False)
+
+# --- Jaccard (über Token, alle Paare auf einmal) ---
+def jaccard_condensed(token_sets):
+    # Schnittmengen aller Paare als dünnbesetztes Matrixprodukt X·Xᵀ der Binärmatrix,
+    # Vereinigung = |A| + |B| - |A ∩ B|. Nur die obere Dreiecksmatrix des Produkts wird
+    # in den komprimierten Vektor gestreut; Paare ohne gemeinsame Tokens haben Distanz 1.
+    n = len(token_sets)
+    binary = MultiLabelBinarizer(sparse_output=True).fit_transform(token_sets).astype(np.int32)
+    sizes = np.asarray(binary.sum(axis=1)).ravel()
+    upper = triu(binary @ binary.T, k=1).tocoo()
+    i, j, inter = upper.row.astype(np.int64), upper.col.astype(np.int64), upper.data
+    condensed = np.ones(n * (n - 1) // 2)
+    condensed[n * i - i * (i + 1) // 2 + (j - i - 1)] = 1 - inter / (sizes[i] + sizes[j] - inter)
+    return condensed
+
+def jaccard_knn_graph(binary, n_neighbors=15, block_size=256):
+    # k nächste Nachbarn nach Jaccard-Distanz als dünnbesetzter Distanzgraph, blockweise
+    # über X·Xᵀ; nur Paare mit gemeinsamen Tokens kommen in Frage (sonst Distanz 1).
+    n = binary.shape[0]
+    sizes = np.asarray(binary.sum(axis=1)).ravel()
+    k = min(n_neighbors, n - 1)
+    rows, cols, data = [], [], []
+    for start in range(0, n, block_size):
+        inter = (binary[start:start + block_size] @ binary.T).tocoo()
+        i, j, v = inter.row + start, inter.col, inter.data
+        keep = i != j
+        i, j, v = i[keep], j[keep], v[keep]
+        dist = 1 - v / (sizes[i] + sizes[j] - v)
+        order = np.lexsort((dist, i))
+        i, j, dist = i[order], j[order], dist[order]
+        # Rang innerhalb der Zeile: Position minus Beginn der Zeile
+        first = np.searchsorted(i, i)
+        keep = np.arange(len(i)) - first < k
+        rows.append(i[keep])
+        cols.append(j[keep])
+        data.append(dist[keep])
+    return csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+
+# --- Registry: Repräsentationen und Metriken ---
+# Jede Metrik gibt an, welche Repräsentation sie braucht; Tokenisierung und
+# Vektorisierung passieren pro Korpus nur einmal und werden geteilt.
+REPRESENTATIONS = {}
+METRICS = {}
+
+def register_representation(name):
+    def decorator(builder):
+        REPRESENTATIONS[name] = builder
+        return builder
+    return decorator
+
+def register_metric(name, representation):
+    def decorator(function):
+        METRICS[name] = (representation, function)
+        return function
+    return decorator
+
+@register_representation('raw')
+def _raw(corpus):
+    return corpus.sentences
+
+@register_representation('tokens')
+def _tokens(corpus):
+    return [re.findall(r'\w+', s.lower()) for s in corpus.sentences]
+
+@register_representation('token_sets')
+def _token_sets(corpus):
+    return [set(tokens) for tokens in corpus.representation('tokens')]
+
+@register_representation('token_binary')
+def _token_binary(corpus):
+    return MultiLabelBinarizer(sparse_output=True).fit_transform(
+        corpus.representation('token_sets')).astype(np.int32).tocsr()
+
+@register_representation('tfidf')
+def _tfidf(corpus):
+    # nutzt die gemeinsame Tokenisierung statt des eigenen Tokenizers von sklearn
+    vectorizer = TfidfVectorizer(analyzer=lambda tokens: tokens)
+    return vectorizer.fit_transform(corpus.representation('tokens'))
+
+register_metric('levenshtein', 'raw')(levenshtein_condensed)
+register_metric('cosine', 'tfidf')(cosine_condensed)
+register_metric('jaccard', 'token_sets')(jaccard_condensed)
+
+# Ab dieser Korpusgröße wird nicht mehr über alle n² Paare geclustert
+# (10⁵ Sätze wären ~40 GB komprimierte Distanzen), sondern approximativ über
+# einen kNN-Graphen. Dafür braucht die Metrik eine Vektor-Repräsentation und
+# entweder eine sklearn-Metrik oder eine Funktion, die den kNN-Graphen baut.
+# Levenshtein hat keine Vektorform: große Korpora nur mit backend='exact'.
+APPROXIMATE_LIMIT = 20_000
+KNN_FEATURES = {
+    'cosine': ('tfidf', 'cosine'),
+    'jaccard': ('token_binary', jaccard_knn_graph),
+}
+
+class Corpus:
+    def __init__(self, sentences, cache_dir='.distance_cache'):
+        self.sentences = list(sentences)
+        self.cache_dir = cache_dir
+        self.hash = hashlib.sha1('\x00'.join(self.sentences).encode('utf-8')).hexdigest()
+        self._representations = {}
+        self._distances = {}
+
+    def representation(self, name):
+        if name not in self._representations:
+            self._representations[name] = REPRESENTATIONS[name](self)
+        return self._representations[name]
+
+    def distances(self, metric):
+        # Erst im Speicher, dann als .npy-Datei (Schlüssel: Hash des Korpus) nachsehen,
+        # sonst berechnen und speichern. Andere Metriken werden nicht angefasst.
+        if metric not in self._distances:
+            path = os.path.join(self.cache_dir, f'{self.hash[:16]}_{metric}.npy')
+            if os.path.exists(path):
+                self._distances[metric] = np.load(path)
+            else:
+                representation, function = METRICS[metric]
+                self._distances[metric] = function(self.representation(representation))
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.save(path, self._distances[metric])
+        return self._distances[metric]
+
+    def linkage(self, metric, method='average', backend='auto'):
+        # backend: 'exact' (alle Paare), 'approximate' (kNN-MST, immer Single-Linkage)
+        # oder 'auto' (approximativ ab APPROXIMATE_LIMIT Sätzen)
+        if backend == 'auto':
+            backend = 'approximate' if len(self.sentences) > APPROXIMATE_LIMIT else 'exact'
+        if backend == 'approximate':
+            if metric not in KNN_FEATURES:
+                raise ValueError(f"Metrik '{metric}' hat keine Vektor-Repräsentation für den "
+                                 f"kNN-Graphen; backend='exact' erzwingt alle Paare")
+            representation, knn_metric = KNN_FEATURES[metric]
+            features = self.representation(representation)
+            if callable(knn_metric):
+                return approximate_linkage(knn_metric(features), metric='precomputed')
+            return approximate_linkage(features, metric=knn_metric)
+        return cluster(self.distances(metric), method)
+
+# --- Clustering ---
+def cluster(distances, method='average'):
+    # linkage erwartet eine komprimierte Distanzliste; eine quadratische Matrix würde
+    # sonst als Beobachtungsvektoren interpretiert. single/complete/average/weighted/ward
+    # laufen in scipy speicherschonend in O(n²) (MST bzw. Nearest-Neighbor-Chain).
+    distances = np.asarray(distances, dtype=float)
+    if distances.ndim == 2:
+        distances = squareform(distances, checks=False)
+    return linkage(distances, method=method)
+
+def approximate_linkage(features, n_neighbors=15, metric='cosine'):
+    # Für sehr große Korpora: Single-Linkage über den minimalen Spannbaum eines
+    # k-Nächste-Nachbarn-Graphen statt aller n² Paare. Getrennte Komponenten werden
+    # zum Schluss oberhalb der größten Distanz verbunden. Mit metric='precomputed' ist
+    # features bereits der dünnbesetzte kNN-Distanzgraph (z.B. aus jaccard_knn_graph).
+    n = features.shape[0]
+    if metric == 'precomputed':
+        graph = csr_matrix(features, dtype=float, copy=True)
+    else:
+        graph = kneighbors_graph(features, min(n_neighbors, n - 1), mode='distance', metric=metric)
+    # Distanz 0 (identische Sätze) würde als fehlende Kante gelten; vor dem
+    # Symmetrisieren anheben, sonst verwirft maximum() die expliziten Nullen
+    graph.data = np.maximum(graph.data, 1e-12)
+    graph = graph.maximum(graph.T)
+    mst = minimum_spanning_tree(graph).tocoo()
+    edges = sorted(zip(np.where(mst.data > 1e-12, mst.data, 0.0), mst.row, mst.col))
+    n_components, component = connected_components(graph, directed=False)
+    if n_components > 1:
+        top = (max(mst.data) if mst.nnz else 0) + 1
+        roots = [int(np.flatnonzero(component == c)[0]) for c in range(n_components)]
+        edges += [(top, roots[0], r) for r in roots[1:]]
+
+    # Union-Find: Kanten nach Gewicht zusammenführen ergibt die Linkage-Matrix
+    parent = list(range(2 * n - 1))
+    size = [1] * (2 * n - 1)
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    linked = np.zeros((n - 1, 4))
+    for k, (weight, i, j) in enumerate(edges):
+        a, b = find(int(i)), find(int(j))
+        new = n + k
+        parent[a] = parent[b] = new
+        size[new] = size[a] + size[b]
+        linked[k] = (min(a, b), max(a, b), weight, size[new])
+    return linked
 
 # --- Dendrogramm plotten ---
-def plot_dendrogram(matrix, method='average', title='Dendrogramm'):
-    linked = linkage(matrix, method=method)
+def plot_linkage(linked, title='Dendrogramm', leaf_labels=None, max_leaves=50):
     plt.figure(figsize=(10, 5))
-    dendrogram(linked, labels=labels, orientation='top', distance_sort='descending')
+    if len(linked) + 1 > max_leaves:
+        # bei großen Korpora nur die obersten max_leaves Cluster zeichnen
+        dendrogram(linked, orientation='top', truncate_mode='lastp', p=max_leaves)
+    else:
+        dendrogram(linked, labels=leaf_labels, orientation='top', distance_sort='descending')
     plt.title(title)
     plt.tight_layout()
     plt.show()
 
-plot_dendrogram(lev_matrix, title='Dendrogramm (Levenshtein)')
-plot_dendrogram(cosine_matrix, title='Dendrogramm (Cosine TF-IDF)')
-plot_dendrogram(jaccard_matrix, title='Dendrogramm (Jaccard Token)')
+def plot_dendrogram(matrix, method='average', title='Dendrogramm'):
+    plot_linkage(cluster(matrix, method), title, labels)
+
+if __name__ == "__main__":
+    corpus = Corpus(sentences)
+    plot_linkage(corpus.linkage('levenshtein'), 'Dendrogramm (Levenshtein)', labels)
+    plot_linkage(corpus.linkage('cosine'), 'Dendrogramm (Cosine TF-IDF)', labels)
+    plot_linkage(corpus.linkage('jaccard'), 'Dendrogramm (Jaccard Token)', labels)
@@ -0,0 +1,198 @@
+"""
+Gemeinsame Levenshtein-Distanz für die Distanz-Skripte.
+
+Für reine Distanzabfragen wird der bit-parallele Algorithmus von Myers
+(in der Formulierung von Hyyrö) verwendet: Eine DP-Spalte wird als
+Bitvektor (Python-int) gespeichert, der Speicherbedarf ist O(n) statt O(m·n).
+Zeichen- und Wortebene funktionieren gleich, Wörter werden vorher auf
+ganzzahlige IDs abgebildet.
+"""
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence
+
+# Bis zu dieser Schranke ist das Diagonalband schneller als der Bitvektor-Algorithmus
+BAND_LIMIT = 2
+
+
+def _strip_common_affixes(a: Sequence, b: Sequence):
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    return a[start:end_a], b[start:end_b]
+
+
+def levenshtein_last_row(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[int]:
+    """
+    Liefert die letzte Zeile der DP-Matrix, also D[len(a)][j] für j = 0..len(b).
+    """
+    m = len(a)
+    if m == 0:
+        return list(range(len(b) + 1))
+    peq: Dict[Hashable, int] = {}
+    for i, symbol in enumerate(a):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+    full = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    row = [score]
+    for symbol in b:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        row.append(score)
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return row
+
+
+def levenshtein(a: Sequence[Hashable], b: Sequence[Hashable]) -> int:
+    """
+    Berechnet die Levenshtein-Distanz zwischen zwei Sequenzen (Strings oder Token-Listen).
+    """
+    a, b = _strip_common_affixes(a, b)
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b)
+    return levenshtein_last_row(a, b)[-1]
+
+
+def levenshtein_within(a: Sequence[Hashable], b: Sequence[Hashable], max_distance: int) -> Optional[int]:
+    """
+    Levenshtein-Distanz im Diagonalband der Breite max_distance (Ukkonen).
+    Gibt None zurück, sobald feststeht, dass die Distanz größer als max_distance ist.
+    """
+    a, b = _strip_common_affixes(a, b)
+    if len(a) > len(b):
+        a, b = b, a
+    m, n = len(a), len(b)
+    k = max_distance
+    if n - m > k:
+        return None
+    if m == 0:
+        return n
+    too_far = k + 1
+    prev = [j if j <= k else too_far for j in range(n + 1)]
+    cur = [too_far] * (n + 1)
+    for i in range(1, m + 1):
+        lo, hi = max(1, i - k), min(n, i + k)
+        cur[lo - 1] = i if lo == 1 else too_far
+        if hi < n:
+            cur[hi + 1] = too_far
+        symbol = a[i - 1]
+        row_min = cur[lo - 1]
+        for j in range(lo, hi + 1):
+            value = prev[j - 1] if symbol == b[j - 1] else prev[j - 1] + 1
+            if prev[j] + 1 < value:
+                value = prev[j] + 1
+            if cur[j - 1] + 1 < value:
+                value = cur[j - 1] + 1
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > k:
+            return None
+        prev, cur = cur, prev
+    return prev[n] if prev[n] <= k else None
+
+
+def _levenshtein_last_row_bounded(a: Sequence[Hashable], b: Sequence[Hashable], max_distance: int) -> Optional[int]:
+    """
+    Wie levenshtein_last_row (mit len(a) <= len(b)), bricht aber ab, sobald die
+    Distanz sicher größer als max_distance ist. Werte entlang einer Diagonalen
+    fallen nie, daher ist die Zelle D[j - (n - m)][j] auf der Diagonalen der
+    Zielzelle eine untere Schranke; sie ergibt sich aus den vertikalen Deltas
+    per Bitzählung.
+    """
+    m, n = len(a), len(b)
+    peq: Dict[Hashable, int] = {}
+    for i, symbol in enumerate(a):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+    full = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    offset = n - m
+    for j, symbol in enumerate(b, 1):
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+        if j > offset:
+            mask = (1 << (j - offset)) - 1
+            if j + (pv & mask).bit_count() - (mv & mask).bit_count() > max_distance:
+                return None
+    return score if score <= max_distance else None
+
+
+def histogram_lower_bound(hist_a: Counter, hist_b: Counter) -> int:
+    """
+    Untere Schranke aus den Zeichenhäufigkeiten: Jede Operation baut höchstens
+    ein überzähliges und ein fehlendes Zeichen ab.
+    """
+    surplus = sum((hist_a - hist_b).values())
+    deficit = sum((hist_b - hist_a).values())
+    return max(surplus, deficit)
+
+
+def levenshtein_bounded(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    max_distance: int,
+    prefiltered: bool = False
+) -> Optional[int]:
+    """
+    Levenshtein-Distanz, falls sie höchstens max_distance beträgt, sonst None.
+    Vor der DP werden Längendifferenz und Zeichenhistogramm als untere Schranken
+    geprüft; prefiltered=True überspringt das, wenn der Aufrufer die Schranken
+    schon (z.B. vektorisiert) geprüft hat.
+    """
+    if max_distance < 0 or abs(len(a) - len(b)) > max_distance:
+        return None
+    if not prefiltered and histogram_lower_bound(Counter(a), Counter(b)) > max_distance:
+        return None
+    if max_distance <= BAND_LIMIT:
+        return levenshtein_within(a, b, max_distance)
+    a, b = _strip_common_affixes(a, b)
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return len(b)
+    return _levenshtein_last_row_bounded(a, b, max_distance)
+
+
+def encode_tokens(tokens: Sequence[Hashable], vocab: Dict[Hashable, int]) -> List[int]:
+    """
+    Bildet Tokens auf ganzzahlige IDs ab; neue Tokens werden in vocab ergänzt.
+    """
+    return [vocab.setdefault(token, len(vocab)) for token in tokens]
+
+
+def levenshtein_words(s1: str, s2: str, vocab: Optional[Dict[str, int]] = None) -> int:
+    """
+    Levenshtein-Distanz auf Wortebene (Tokens per Leerzeichen getrennt).
+    """
+    if vocab is None:
+        vocab = {}
+    return levenshtein(encode_tokens(s1.split(), vocab), encode_tokens(s2.split(), vocab))
@@ -39,6 +39,109 @@ def simulate_generations(
 
     return variances, saved_samples
 
+def batched_cholesky(covariances: np.ndarray) -> np.ndarray:
+    """Cholesky-Faktoren für einen Stapel von Kovarianzmatrizen (T, dim, dim).
+    Ist eine Matrix numerisch nicht mehr positiv definit, wird über die
+    Eigenzerlegung mit abgeschnittenen Eigenwerten faktorisiert."""
+    try:
+        return np.linalg.cholesky(covariances)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariances)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))[:, None, :]
+
+def simulate_trials(
+    dim: int,
+    n_samples: int,
+    n_generations: int,
+    n_trials: int,
+    seed: int = None
+) -> np.ndarray:
+    """Simuliert n_trials unabhängige Verläufe gleichzeitig und gibt die Varianzen
+    (Spur der Kovarianz) als Array der Form (n_trials, n_generations + 1) zurück.
+    Pro Generation werden alle Standardnormal-Zufallszahlen auf einmal gezogen,
+    mit den Cholesky-Faktoren multipliziert und Mittelwert/Kovarianz je Trial geschätzt."""
+    rng = np.random.default_rng(seed)
+    mean, covariance = generate_initial_parameters(dim)
+    means = np.broadcast_to(mean, (n_trials, dim)).copy()
+    covariances = np.broadcast_to(covariance, (n_trials, dim, dim)).copy()
+    variances = np.empty((n_trials, n_generations + 1))
+    variances[:, 0] = np.trace(covariance)
+
+    for generation in range(n_generations):
+        factors = batched_cholesky(covariances)
+        z = rng.standard_normal((n_trials, n_samples, dim))
+        samples = means[:, None, :] + z @ factors.transpose(0, 2, 1)
+        means = samples.mean(axis=1)
+        centered = samples - means[:, None, :]
+        covariances = centered.transpose(0, 2, 1) @ centered / (n_samples - 1)
+        variances[:, generation + 1] = np.einsum('tii->t', covariances)
+
+    return variances
+
+def streaming_generation(
+    mean: np.ndarray,
+    covariance: np.ndarray,
+    n_samples: int,
+    rng: np.random.Generator,
+    chunk_size: int = 100_000,
+    max_saved: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Zieht eine Generation blockweise und schätzt Mittelwert und Kovarianz mit
+    paarweisen (Welford/Chan) Updates, ohne die volle Stichprobe zu speichern.
+    Gibt außerdem bis zu max_saved Stichproben zum Zeichnen zurück; da alle
+    Ziehungen unabhängig sind, sind die ersten max_saved eine gleichverteilte Teilstichprobe."""
+    dim = len(mean)
+    factor = batched_cholesky(covariance[None])[0]
+    count = 0
+    running_mean = np.zeros(dim)
+    m2 = np.zeros((dim, dim))
+    kept = []
+    n_kept = 0
+    while count < n_samples:
+        size = min(chunk_size, n_samples - count)
+        chunk = mean + rng.standard_normal((size, dim)) @ factor.T
+        if n_kept < max_saved:
+            kept.append(chunk[:max_saved - n_kept].copy())
+            n_kept += len(kept[-1])
+        chunk_mean = chunk.mean(axis=0)
+        centered = chunk - chunk_mean
+        delta = chunk_mean - running_mean
+        total = count + size
+        running_mean = running_mean + delta * (size / total)
+        m2 += centered.T @ centered + np.outer(delta, delta) * (count * size / total)
+        count = total
+    saved = np.concatenate(kept) if kept else np.empty((0, dim))
+    return running_mean, m2 / (n_samples - 1), saved
+
+def simulate_generations_streaming(
+    dim: int,
+    n_samples: int,
+    n_generations: int,
+    sample_indices_to_save: Tuple[int, int, int],
+    chunk_size: int = 100_000,
+    max_saved: int = 10_000,
+    seed: int = None
+) -> Tuple[list, Dict[int, np.ndarray]]:
+    """Wie simulate_generations, aber mit Speicherbedarf O(dim² + chunk_size):
+    die Parameter werden blockweise geschätzt, gespeichert werden für die
+    ausgewählten Generationen nur bis zu max_saved Stichproben."""
+    rng = np.random.default_rng(seed)
+    mean, covariance = generate_initial_parameters(dim)
+    variances = [np.trace(covariance)]
+    saved_samples = {}
+
+    for generation in range(n_generations):
+        keep = max_saved if generation in sample_indices_to_save else 0
+        mean, covariance, samples = streaming_generation(
+            mean, covariance, n_samples, rng, chunk_size, keep
+        )
+        variances.append(np.trace(covariance))
+
+        if keep:
+            saved_samples[generation] = samples
+
+    return variances, saved_samples
+
 def plot_variance_over_generations(variances: list, ax: plt.Axes) -> None:
     """Zeichnet den Verlauf der Varianz über die Generationen."""
     ax.plot(variances, marker='o')
@@ -47,9 +150,35 @@ def plot_variance_over_generations(variances: list, ax: plt.Axes) -> None:
     ax.set_ylabel('Varianz')
     ax.grid(True)
 
+MAX_SCATTER_POINTS = 20_000
+
+def use_headless_backend() -> None:
+    """Schaltet auf das Agg-Backend um: Ausgabe in Dateien, kein Display nötig."""
+    plt.switch_backend('Agg')
+
+def plot_sample_density(
+    samples: np.ndarray,
+    ax: plt.Axes,
+    cmap: str = 'Blues',
+    bins: int = 200,
+    extent: Tuple[float, float, float, float] = None,
+    alpha: float = 1.0
+) -> None:
+    """Zeichnet die Stichproben als 2D-Histogramm; der Aufwand hängt nur von
+    der Anzahl der Bins ab, nicht von der Anzahl der Punkte."""
+    if extent is None:
+        extent = (samples[:, 0].min(), samples[:, 0].max(), samples[:, 1].min(), samples[:, 1].max())
+    counts, _, _ = np.histogram2d(samples[:, 0], samples[:, 1], bins=bins,
+                                  range=[extent[:2], extent[2:]])
+    ax.imshow(np.ma.masked_equal(counts.T, 0), origin='lower', extent=extent,
+              aspect='auto', cmap=cmap, alpha=alpha, interpolation='nearest')
+
 def plot_sample_scatter(samples: np.ndarray, ax: plt.Axes, title: str) -> None:
-    """Zeichnet einen Scatter-Plot der Stichproben."""
-    ax.scatter(samples[:, 0], samples[:, 1], alpha=0.5)
+    """Zeichnet einen Scatter-Plot der Stichproben (bei vielen Punkten als Dichte)."""
+    if len(samples) > MAX_SCATTER_POINTS:
+        plot_sample_density(samples, ax)
+    else:
+        ax.scatter(samples[:, 0], samples[:, 1], alpha=0.5)
     ax.set_title(title)
     ax.set_xlabel('X1')
     ax.set_ylabel('X2')
@@ -63,21 +192,36 @@ def getTitles_from_sample_indices(sample_indices: Tuple[int, int, int]) -> Dict[
         sample_indices[2]: f'Endsample (Generation {sample_indices[2]})'
     }
 
+def results_figure(fig: plt.Figure = None) -> Tuple[plt.Figure, np.ndarray]:
+    """Liefert eine 2x2-Figur; eine übergebene Figur wird geleert und wiederverwendet."""
+    if fig is None:
+        return plt.subplots(2, 2, figsize=(12, 10))
+    for ax in fig.axes:
+        ax.clear()
+    return fig, np.array(fig.axes).reshape(2, 2)
+
 def plot_results(
     variances: list,
     saved_samples: Dict[int, np.ndarray],
-    sample_indices_to_save: Tuple[int, int, int]
-) -> None:
-    """Erstellt ein 2x2-Plot mit Varianzverlauf und ausgewählten Stichproben."""
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    sample_indices_to_save: Tuple[int, int, int],
+    output: str = None,
+    fig: plt.Figure = None
+) -> plt.Figure:
+    """Erstellt ein 2x2-Plot mit Varianzverlauf und ausgewählten Stichproben.
+    Mit output wird die Grafik in eine Datei geschrieben statt angezeigt."""
+    fig, axes = results_figure(fig)
 
     # variances in the first subplot
     plot_variance_over_generations(variances, ax=axes[0, 0])
     # scatter plots in the other subplots
     scatter_samples_with_titles(saved_samples, sample_indices_to_save, axes)
 
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    if output:
+        fig.savefig(output)
+    else:
+        plt.show()
+    return fig
 
 def scatter_samples_with_titles(saved_samples, sample_indices_to_save, axes):
     titles = getTitles_from_sample_indices(sample_indices_to_save)
@@ -90,16 +234,20 @@ def scatter_samples_with_titles(saved_samples, sample_indices_to_save, axes):
         if sample is not None:
             plot_sample_scatter(sample, ax=axes[row, col], title=titles[gen])
 
-def simulate( n_samples:int, n_generations:int) -> Tuple[list, Dict[int, np.ndarray]]: 
-    """Hauptfunktion zur Ausführung der Simulation und Visualisierung."""
+def simulate( n_samples:int, n_generations:int, output: str = None, fig: plt.Figure = None) -> plt.Figure: 
+    """Hauptfunktion zur Ausführung der Simulation und Visualisierung.
+    Mit output läuft das Zeichnen ohne Display (Agg) und schreibt in die Datei;
+    die zurückgegebene Figur kann für weitere Simulationen übergeben werden."""
     
     sample_indices_to_save = (0, n_generations // 2, n_generations - 1)
     dim=2
 
+    if output:
+        use_headless_backend()
     variances, saved_samples = simulate_generations(
         dim, n_samples, n_generations, sample_indices_to_save
     )
-    plot_results(variances, saved_samples, sample_indices_to_save)
+    return plot_results(variances, saved_samples, sample_indices_to_save, output, fig)
 
 if __name__ == "__main__":
     simulate(
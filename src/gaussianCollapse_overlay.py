@@ -1,6 +1,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from typing import Tuple, Dict
+from gaussianCollapse import (
+    simulate_generations_streaming, plot_sample_density, use_headless_backend,
+    results_figure, MAX_SCATTER_POINTS
+)
+
+DENSITY_CMAPS = {'gray': 'Greys', 'blue': 'Blues', 'green': 'Greens'}
 
 
 def generate_initial_parameters(dim: int) -> Tuple[np.ndarray, np.ndarray]:
@@ -54,8 +60,11 @@ def plot_variance_over_generations(variances: list, ax: plt.Axes) -> None:
 
 
 def plot_initial_sample(ax: plt.Axes, samples: np.ndarray, generation: int) -> None:
-    """Plot the initial sample distribution."""
-    ax.scatter(samples[:, 0], samples[:, 1], c='gray', alpha=0.5)
+    """Plot the initial sample distribution (as a density for large samples)."""
+    if len(samples) > MAX_SCATTER_POINTS:
+        plot_sample_density(samples, ax, cmap=DENSITY_CMAPS['gray'])
+    else:
+        ax.scatter(samples[:, 0], samples[:, 1], c='gray', alpha=0.5)
     ax.set_title(f'Initial Sample (Generation {generation})')
     ax.set_xlabel('X1')
     ax.set_ylabel('X2')
@@ -70,9 +79,23 @@ def plot_sample_overlay(
     overlay_gen: int,
     overlay_color: str
 ) -> None:
-    """Overlay base and overlay samples on the same axes."""
-    ax.scatter(base_samples[:, 0], base_samples[:, 1], c='gray', alpha=0.3, label=f'Gen {base_gen}')
-    ax.scatter(overlay_samples[:, 0], overlay_samples[:, 1], c=overlay_color, alpha=0.5, label=f'Gen {overlay_gen}')
+    """Overlay base and overlay samples on the same axes.
+
+    Large samples are drawn as 2-D histograms on a shared extent instead of
+    one marker per point.
+    """
+    if max(len(base_samples), len(overlay_samples)) > MAX_SCATTER_POINTS:
+        both = np.concatenate([base_samples[:, :2], overlay_samples[:, :2]])
+        extent = (both[:, 0].min(), both[:, 0].max(), both[:, 1].min(), both[:, 1].max())
+        plot_sample_density(base_samples, ax, cmap=DENSITY_CMAPS['gray'], extent=extent, alpha=0.6)
+        plot_sample_density(overlay_samples, ax, cmap=DENSITY_CMAPS.get(overlay_color, 'Blues'),
+                            extent=extent, alpha=0.7)
+        # proxy artists for the legend
+        ax.plot([], [], 's', c='gray', label=f'Gen {base_gen}')
+        ax.plot([], [], 's', c=overlay_color, label=f'Gen {overlay_gen}')
+    else:
+        ax.scatter(base_samples[:, 0], base_samples[:, 1], c='gray', alpha=0.3, label=f'Gen {base_gen}')
+        ax.scatter(overlay_samples[:, 0], overlay_samples[:, 1], c=overlay_color, alpha=0.5, label=f'Gen {overlay_gen}')
     ax.set_title(f'Comparison: Gen {base_gen} vs Gen {overlay_gen}')
     ax.set_xlabel('X1')
     ax.set_ylabel('X2')
@@ -83,13 +106,19 @@ def plot_sample_overlay(
 def plot_results(
     variances: list,
     saved_samples: Dict[int, np.ndarray],
-    sample_indices_to_save: Tuple[int, int, int]
-) -> None:
-    """Create a 2x2 figure: variance plot and sample distributions with overlays."""
+    sample_indices_to_save: Tuple[int, int, int],
+    output: str = None,
+    fig: plt.Figure = None
+) -> plt.Figure:
+    """Create a 2x2 figure: variance plot and sample distributions with overlays.
+
+    With output the figure is saved to that file instead of shown; pass a
+    previously returned fig to redraw it instead of building a new one.
+    """
     initial_gen, mid_gen, last_gen = sample_indices_to_save
     initial_samples = saved_samples[initial_gen]
 
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    fig, axes = results_figure(fig)
 
     # Top-left: variance trace
     plot_variance_over_generations(variances, ax=axes[0, 0])
@@ -117,19 +146,37 @@ def plot_results(
         overlay_color='green'
     )
 
-    plt.tight_layout()
-    plt.show()
-
-
-def simulate(n_samples: int, n_generations: int) -> None:
-    """Main function to run simulation and plotting."""
+    fig.tight_layout()
+    if output:
+        fig.savefig(output)
+    else:
+        plt.show()
+    return fig
+
+
+def simulate(n_samples: int, n_generations: int, streaming: bool = False,
+             chunk_size: int = 100_000, max_saved: int = 10_000,
+             output: str = None, fig: plt.Figure = None) -> plt.Figure:
+    """Main function to run simulation and plotting.
+
+    With streaming=True, mean and covariance are estimated chunk by chunk and
+    at most max_saved samples per saved generation are kept for plotting.
+    With output, plotting runs headless (Agg) and writes to that file.
+    """
+    if output:
+        use_headless_backend()
     sample_indices_to_save = (0, n_generations // 2, n_generations - 1)
     dim = 2
 
-    variances, saved_samples = simulate_generations(
-        dim, n_samples, n_generations, sample_indices_to_save
-    )
-    plot_results(variances, saved_samples, sample_indices_to_save)
+    if streaming:
+        variances, saved_samples = simulate_generations_streaming(
+            dim, n_samples, n_generations, sample_indices_to_save, chunk_size, max_saved
+        )
+    else:
+        variances, saved_samples = simulate_generations(
+            dim, n_samples, n_generations, sample_indices_to_save
+        )
+    return plot_results(variances, saved_samples, sample_indices_to_save, output, fig)
 
 
 if __name__ == "__main__":
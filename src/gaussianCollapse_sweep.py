@@ -0,0 +1,102 @@
+import os
+import json
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+from gaussianCollapse import generate_initial_parameters, streaming_generation
+
+
+def checkpoint_path(checkpoint_dir: str, n_samples: int, dim: int, seed: np.random.SeedSequence) -> str:
+    """Checkpoint file of one (n_samples, dim) trajectory.
+
+    The seed's entropy and spawn key are part of the name, so a sweep with a
+    different seed never resumes another sweep's trajectories.
+    """
+    seed_id = "-".join(str(k) for k in (seed.entropy, *seed.spawn_key))
+    return os.path.join(checkpoint_dir, f"trajectory_n{n_samples}_d{dim}_s{seed_id}.npz")
+
+
+def save_checkpoint(path: str, variances: list, mean: np.ndarray, covariance: np.ndarray,
+                    rng: np.random.Generator) -> None:
+    """Write the checkpoint atomically, so an interruption never leaves a broken file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, variances=np.asarray(variances), mean=mean, covariance=covariance,
+                 rng_state=json.dumps(rng.bit_generator.state))
+    os.replace(tmp_path, path)
+
+
+def run_trajectory(
+    n_samples: int,
+    dim: int,
+    n_generations: int,
+    seed: np.random.SeedSequence,
+    checkpoint_dir: str,
+    checkpoint_every: int = 100,
+    chunk_size: int = 100_000
+) -> np.ndarray:
+    """Run one trajectory, resuming from its checkpoint if there is one."""
+    path = checkpoint_path(checkpoint_dir, n_samples, dim, seed)
+    rng = np.random.default_rng(seed)
+    if os.path.exists(path):
+        with np.load(path) as checkpoint:
+            variances = list(checkpoint["variances"])
+            mean, covariance = checkpoint["mean"], checkpoint["covariance"]
+            rng.bit_generator.state = json.loads(str(checkpoint["rng_state"]))
+    else:
+        mean, covariance = generate_initial_parameters(dim)
+        variances = [np.trace(covariance)]
+
+    for generation in range(len(variances) - 1, n_generations):
+        mean, covariance, _ = streaming_generation(mean, covariance, n_samples, rng, chunk_size)
+        variances.append(np.trace(covariance))
+        if (generation + 1) % checkpoint_every == 0 or generation + 1 == n_generations:
+            save_checkpoint(path, variances, mean, covariance, rng)
+
+    return np.asarray(variances[:n_generations + 1])
+
+
+def run_sweep(
+    n_samples_grid: Sequence[int],
+    dim_grid: Sequence[int],
+    n_generations: int,
+    seed: int = 0,
+    checkpoint_dir: str = "checkpoints",
+    output: str = "sweep_results.npz",
+    checkpoint_every: int = 100,
+    processes: int = None
+) -> np.ndarray:
+    """Run all (n_samples, dim) configurations on a process pool.
+
+    Every configuration gets its own stream from SeedSequence.spawn, so the
+    results do not depend on the number of processes. Interrupted sweeps
+    continue from the checkpoints. The variances are collected into one array
+    of shape (len(n_samples_grid), len(dim_grid), n_generations + 1).
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    configs = list(itertools.product(n_samples_grid, dim_grid))
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+
+    with ProcessPoolExecutor(processes) as executor:
+        futures = [
+            executor.submit(run_trajectory, n_samples, dim, n_generations, child,
+                            checkpoint_dir, checkpoint_every)
+            for (n_samples, dim), child in zip(configs, seeds)
+        ]
+        trajectories = [future.result() for future in futures]
+
+    variances = np.stack(trajectories).reshape(len(n_samples_grid), len(dim_grid), n_generations + 1)
+    np.savez(output, variances=variances, n_samples=np.asarray(n_samples_grid),
+             dim=np.asarray(dim_grid), seed=seed)
+    return variances
+
+
+if __name__ == "__main__":
+    results = run_sweep(
+        n_samples_grid=[100, 1000, 10000],
+        dim_grid=[2, 10],
+        n_generations=3000
+    )
+    print("Final variances (rows: n_samples, columns: dim):")
+    print(results[:, :, -1])
@@ -1,8 +1,130 @@
 import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import git
 import pandas as pd
 
-def extract_file_versions(repo_path: str, file_path: str, output_folder: str) -> pd.DataFrame:
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:  # ohne pyarrow nur CSV-Ausgabe
+    pyarrow = None
+
+def _git_lines(repo_path: str, *args: str):
+    out = subprocess.run(["git", "-C", repo_path, *args], check=True,
+                         capture_output=True, text=True, encoding="utf-8").stdout
+    return out.splitlines()
+
+def _cat_file_stream(repo_path: str, mode: str, names):
+    # Startet einen einzigen "git cat-file --batch(-check)"-Prozess; die Anfragen
+    # werden in einem Thread geschrieben, damit die Ausgabe gleichzeitig gelesen werden kann.
+    proc = subprocess.Popen(["git", "-C", repo_path, "cat-file", mode],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def feed():
+        for name in names:
+            proc.stdin.write(f"{name}\n".encode("utf-8"))
+        proc.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    return proc, writer
+
+def _blob_ids(repo_path: str, commit_ids, file_path: str):
+    # Blob-SHA und Größe für <commit>:<pfad>, ohne Inhalte zu lesen
+    proc, writer = _cat_file_stream(repo_path, "--batch-check",
+                                    [f"{c}:{file_path}" for c in commit_ids])
+    result = []
+    for _ in commit_ids:
+        header = proc.stdout.readline().decode("utf-8").split()
+        result.append(header[0] if len(header) == 3 and header[1] == "blob" else None)
+    writer.join()
+    proc.wait()
+    return result
+
+def _read_blobs(repo_path: str, blob_ids):
+    proc, writer = _cat_file_stream(repo_path, "--batch", blob_ids)
+    for blob_id in blob_ids:
+        header = proc.stdout.readline().split()
+        size = int(header[2])
+        data = proc.stdout.read(size)
+        proc.stdout.read(1)  # abschließender Zeilenumbruch
+        yield blob_id, data
+    writer.join()
+    proc.wait()
+
+def extract_file_versions(repo_path: str, file_path: str, output_folder: str,
+                          backend: str = "cat-file") -> pd.DataFrame:
+    if backend == "gitpython":
+        return _extract_file_versions_gitpython(repo_path, file_path, output_folder)
+    start_time = time.perf_counter()
+    repo_root = _git_lines(repo_path, "rev-parse", "--show-toplevel")[0]
+    file_basename = os.path.basename(file_path)
+    git_path = file_path.replace(os.sep, '/')
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    # check if file exists in the repository
+    if not os.path.exists(os.path.join(repo_root, file_path)):
+        raise FileNotFoundError(f"file {file_path} not found in repository {repo_path}")
+    else:
+        print(f"file {file_path} found in repository {repo_path}")
+
+    # ein git log für alle Commits, ein cat-file-Prozess für alle Blob-IDs
+    commits = [line.split(" ", 1) for line in
+               _git_lines(repo_path, "log", "--format=%H %cI", "--", git_path)]
+    blob_ids = _blob_ids(repo_path, [sha for sha, _ in commits], git_path)
+
+    # gleiche Inhalte in vielen Commits: jeden Blob nur einmal lesen und schreiben
+    output_files = {}
+    to_read = []
+    for blob_id in dict.fromkeys(b for b in blob_ids if b is not None):
+        output_file = os.path.join(output_folder, f"{file_basename}_{blob_id[:8]}.py")
+        output_files[blob_id] = output_file
+        to_read.append(blob_id)
+
+    lengths = {}
+    written = skipped = n_bytes = 0
+    for blob_id, data in _read_blobs(repo_path, to_read):
+        text = data.decode("utf-8")
+        lengths[blob_id] = len(text)
+        n_bytes += len(data)
+        output_file = output_files[blob_id]
+        if os.path.exists(output_file):
+            skipped += 1
+            continue
+        with open(output_file, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        written += 1
+
+    commit_data = []
+    for (sha, committed), blob_id in zip(commits, blob_ids):
+        if blob_id is None:
+            continue
+        committed = datetime.fromisoformat(committed)
+        commit_data.append({
+            'commit_id': sha[:8],  # Kürzere Commit-ID
+            'date': committed.strftime('%Y-%m-%d'),
+            'time': committed.strftime('%H:%M:%S'),
+            'file_length': lengths[blob_id],
+            'blob_id': blob_id[:8],
+            'snapshot': os.path.basename(output_files[blob_id]),
+        })
+
+    elapsed = time.perf_counter() - start_time
+    print(f"{len(commit_data)} commits, {len(to_read)} unique blobs "
+          f"({written} written, {skipped} already present), "
+          f"{n_bytes / 1e6:.2f} MB in {elapsed:.2f}s "
+          f"({len(commit_data) / elapsed:.0f} commits/s, {n_bytes / 1e6 / elapsed:.2f} MB/s)")
+
+    df = pd.DataFrame(commit_data)
+    return df
+
+def _extract_file_versions_gitpython(repo_path: str, file_path: str, output_folder: str) -> pd.DataFrame:
     repo = git.Repo(repo_path)
     file_basename = os.path.basename(file_path)
     
@@ -26,9 +148,10 @@ def extract_file_versions(repo_path: str, file_path: str, output_folder: str) ->
         
         with open(output_file, "w", encoding="utf-8") as f:
             blob = commit.tree / file_path.replace(os.sep, '/')
-            # get the text length of the file
-            length = len(blob.data_stream.read().decode("utf-8"))   
-            f.write(blob.data_stream.read().decode("utf-8"))
+            # read and decode the blob only once
+            text = blob.data_stream.read().decode("utf-8")
+            length = len(text)
+            f.write(text)
         
         print(f"Snapshot saved: {output_file}")
         
@@ -58,12 +181,156 @@ def analyze_commit_metadata(repo_path: str, file_path: str):
 
     df_commits = pd.DataFrame(commit_data)
     return df_commits
-# Beispielaufruf
-repo_path = r"./"
-file_path = r"src/pipelineResearch.py"  # Relativ zum Repository-Root
-output_folder = "./data"
-
-df = extract_file_versions(repo_path, file_path, output_folder)
-df.to_csv(os.path.join(output_folder, "commit_data.csv"), index=False)
-df_commits = analyze_commit_metadata(repo_path, file_path)
-df_commits.to_csv(os.path.join(output_folder, "commit_metadata.csv"), index=False)
+ZERO_SHA = "0" * 40
+
+def _pathspec(path: str) -> str:
+    path = path.replace(os.sep, '/')
+    return f":(glob){path}" if any(ch in path for ch in "*?[") else path
+
+def _walk_history(repo_path: str, paths, since_commit: str = None):
+    # Ein einziger git log über alle Pfade: Metadaten plus neue Blob-ID je geändertem Pfad
+    revisions = [f"{since_commit}..HEAD"] if since_commit else []
+    out = subprocess.run(
+        ["git", "-C", repo_path, "log", "--format=%x1e%H%x1f%cI%x1f%cn%x1f%B%x1f",
+         "--raw", "--no-abbrev", "--no-renames", "--diff-merges=first-parent",
+         *revisions, "--", *[_pathspec(p) for p in paths]],
+        check=True, capture_output=True).stdout.decode("utf-8")
+    for record in out.split("\x1e")[1:]:
+        sha, committed, committer, message, raw = record.split("\x1f")
+        changes = []
+        for line in raw.splitlines():
+            if not line.startswith(":"):
+                continue
+            meta, path = line.split("\t", 1)
+            new_blob = meta.split()[3]
+            if new_blob != ZERO_SHA:  # Pfad in diesem Commit gelöscht
+                changes.append((path, new_blob))
+        yield sha, datetime.fromisoformat(committed), committer, message.strip(), changes
+
+def extract_history(repo_path: str, paths, output_folder: str, workers: int = 4,
+                    since_commit: str = None) -> pd.DataFrame:
+    # Mehrere Dateien bzw. Globs (z.B. "src/*.py") in einem Durchgang: ein git log
+    # für alle Pfade, danach die eindeutigen Blobs parallel mit mehreren cat-file-Prozessen.
+    # Mit since_commit nur die Commits, die danach hinzugekommen sind.
+    start_time = time.perf_counter()
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    rows = []
+    snapshots = {}
+    for sha, committed, committer, message, changes in _walk_history(repo_path, paths, since_commit):
+        for path, blob_id in changes:
+            name = f"{path.replace('/', '__')}_{blob_id[:8]}{os.path.splitext(path)[1]}"
+            # gleicher Blob unter mehreren Pfaden: einmal lesen, je Pfad eine Datei
+            snapshots.setdefault(blob_id, {})[os.path.join(output_folder, name)] = None
+            rows.append({
+                "path": path,
+                "commit_id": sha[:8],
+                "date": committed.date(),
+                "day_of_week": committed.strftime("%A"),
+                "time": committed.time(),
+                "user": committer,
+                "commit_message": message,
+                "commit_length": len(message),
+                "blob_id": blob_id[:8],
+                "snapshot": name,
+                "_blob": blob_id,
+            })
+
+    blob_ids = list(snapshots)
+    shards = [blob_ids[k::workers] for k in range(workers)]
+
+    def fetch(shard):
+        lengths = {}
+        for blob_id, data in _read_blobs(repo_path, shard):
+            text = data.decode("utf-8", errors="replace")
+            lengths[blob_id] = len(text)
+            for snapshot in snapshots[blob_id]:
+                if not os.path.exists(snapshot):
+                    with open(snapshot, "w", encoding="utf-8", newline="") as f:
+                        f.write(text)
+        return lengths
+
+    lengths = {}
+    with ThreadPoolExecutor(workers) as executor:
+        for shard_lengths in executor.map(fetch, [s for s in shards if s]):
+            lengths.update(shard_lengths)
+
+    df = pd.DataFrame(rows, columns=["path", "commit_id", "date", "day_of_week", "time", "user",
+                                     "commit_message", "commit_length", "blob_id", "snapshot", "_blob"])
+    df["file_length"] = df["_blob"].map(lengths)
+    df = df.drop(columns="_blob")
+    elapsed = time.perf_counter() - start_time
+    print(f"{df['path'].nunique()} files, {len(df)} file versions, {len(blob_ids)} unique blobs "
+          f"in {elapsed:.2f}s")
+    return df
+
+TABLE_FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+CATEGORY_COLUMNS = ["path", "user", "day_of_week"]
+
+def write_table(df: pd.DataFrame, path_base: str, format: str = "auto") -> str:
+    # Spaltenformat: Parquet oder Arrow IPC (Feather v2), wenn pyarrow verfügbar ist,
+    # sonst CSV. Autor, Wochentag und Pfad werden dictionary-kodiert (category).
+    if format == "auto":
+        format = "parquet" if pyarrow is not None else "csv"
+    if format != "csv" and pyarrow is None:
+        raise ImportError(f"pyarrow is required for format '{format}'")
+    path = path_base + TABLE_FORMATS[format]
+    df = df.astype({c: "category" for c in CATEGORY_COLUMNS if c in df.columns})
+    if format == "parquet":
+        df.to_parquet(path, index=False)
+    elif format == "arrow":
+        pyarrow.feather.write_feather(df, path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+def read_table(path_base: str):
+    for format, suffix in TABLE_FORMATS.items():
+        path = path_base + suffix
+        if not os.path.exists(path):
+            continue
+        if format == "parquet":
+            df = pd.read_parquet(path)
+        elif format == "arrow":
+            df = pyarrow.feather.read_feather(path)
+        else:
+            df = pd.read_csv(path, dtype=str)
+        return df, format
+    return None, None
+
+def refresh_history(repo_path: str, paths, output_folder: str, table_name: str = "commit_history",
+                    format: str = "auto") -> pd.DataFrame:
+    # Inkrementell: nur Commits nach dem zuletzt gespeicherten commit_id durchlaufen
+    # und vor die vorhandenen Zeilen setzen (git log liefert neueste zuerst).
+    path_base = os.path.join(output_folder, table_name)
+    old, old_format = read_table(path_base)
+    if old is not None and len(old):
+        since_commit = str(old["commit_id"].iloc[0])
+        new = extract_history(repo_path, paths, output_folder, since_commit=since_commit)
+        if not len(new):
+            print(f"{path_base}: no new commits since {since_commit}")
+            return old
+        if old_format == "csv":
+            new = new.astype(str)
+        df = pd.concat([new, old.astype({c: str for c in CATEGORY_COLUMNS if c in old.columns})],
+                       ignore_index=True)
+        format = old_format if format == "auto" else format
+    else:
+        df = extract_history(repo_path, paths, output_folder)
+    print(f"Table written: {write_table(df, path_base, format)}")
+    return df
+
+if __name__ == "__main__":
+    # Beispielaufruf
+    repo_path = r"./"
+    file_path = r"src/pipelineResearch.py"  # Relativ zum Repository-Root
+    output_folder = "./data"
+
+    # Ein Durchgang liefert Snapshots, Versionsdaten und Commit-Metadaten zugleich;
+    # bei späteren Läufen werden nur neue Commits gelesen (commit_history.parquet)
+    df = refresh_history(repo_path, [file_path], output_folder)
+    df[["commit_id", "date", "time", "file_length", "blob_id", "snapshot"]].to_csv(
+        os.path.join(output_folder, "commit_data.csv"), index=False)
+    df[["date", "day_of_week", "time", "user", "commit_message", "commit_id", "commit_length"]].to_csv(
+        os.path.join(output_folder, "commit_metadata.csv"), index=False)
@@ -1,5 +1,6 @@
 import pipeline9
 from pipeline9 import PipelineStep, Pipeline
+from editDistance import levenshtein_last_row, levenshtein_within
 
 def apply_moves(count: int, Move, steps: list, current: str) -> str:
     for _ in range(count):
@@ -39,7 +40,92 @@ def define_pipeline_steps():
 
     return Add, Delete, Swap, Move
 
-def levenshtein_path(source: str, target: str):
+def levenshtein_path(source: str, target: str, linear_space: bool = False, max_distance: int = None):
+    # linear_space: Hirschberg (Teile und Herrsche) statt voller dp/op-Matrix.
+    # max_distance: bricht mit None ab, sobald die Distanz größer ist (Ukkonen-Band);
+    # der Pfad wird dann im Band zurückverfolgt, Speicher O(n·k) statt O(m·n).
+    if max_distance is not None and levenshtein_within(source, target, max_distance) is None:
+        return None
+    if not linear_space:
+        if max_distance is not None:
+            return _levenshtein_path_band(source, target, max_distance)
+        return _levenshtein_path_matrix(source, target)
+    ops = []
+    _hirschberg(source, target, 0, 0, ops)
+    return len(ops), ops
+
+def _hirschberg(source: str, target: str, i0: int, j0: int, ops: list):
+    m, n = len(source), len(target)
+    if m == 0:
+        ops.extend(('insert', target[j], j0 + j) for j in range(n))
+        return
+    if n == 0:
+        ops.extend(('delete', None, i0 + i) for i in range(m))
+        return
+    if m == 1 or n == 1 or m * n <= 4096:
+        _, sub_ops = _levenshtein_path_matrix(source, target)
+        for action, arg, idx in sub_ops:
+            ops.append((action, arg, idx + (j0 if action == 'insert' else i0)))
+        return
+    mid = m // 2
+    forward = levenshtein_last_row(source[:mid], target)
+    backward = levenshtein_last_row(source[mid:][::-1], target[::-1])
+    split = min(range(n + 1), key=lambda j: forward[j] + backward[n - j])
+    _hirschberg(source[:mid], target[:split], i0, j0, ops)
+    _hirschberg(source[mid:], target[split:], i0 + mid, j0 + split, ops)
+
+def _levenshtein_path_band(source: str, target: str, k: int):
+    # Wie _levenshtein_path_matrix, aber nur Zellen mit |i - j| <= k; Zeile i speichert
+    # Spalte j an Position j - i + k. Ein Pfad mit Kosten <= k verlässt das Band nie.
+    m, n = len(source), len(target)
+    inf = m + n + 1
+    width = 2 * k + 1
+    dp = [[inf] * width for _ in range(m + 1)]
+    op = [[None] * width for _ in range(m + 1)]
+
+    for j in range(min(n, k) + 1):
+        dp[0][j + k] = j
+        op[0][j + k] = ('insert', target[j-1]) if j else None
+
+    for i in range(1, m + 1):
+        row, prev = dp[i], dp[i-1]
+        if i <= k:
+            row[k - i] = i
+            op[i][k - i] = ('delete', None)
+        for j in range(max(1, i - k), min(n, i + k) + 1):
+            c = j - i + k
+            cost = 0 if source[i-1] == target[j-1] else 1
+            best = prev[c] + cost
+            op_choice = ('match', None) if cost == 0 else ('substitute', target[j-1])
+            # Zeile i-1 liegt um eins verschoben: Spalte j steht dort an Position c + 1
+            if c + 1 < width and prev[c + 1] + 1 < best:
+                best = prev[c + 1] + 1
+                op_choice = ('delete', None)
+            if c > 0 and row[c - 1] + 1 < best:
+                best = row[c - 1] + 1
+                op_choice = ('insert', target[j-1])
+            row[c] = best
+            op[i][c] = op_choice
+
+    i, j, ops = m, n, []
+    while i > 0 or j > 0:
+        action, arg = op[i][j - i + k]
+        if action == 'match':
+            i, j = i-1, j-1
+            continue
+        if action == 'substitute':
+            ops.append(('substitute', arg, i-1))
+            i, j = i-1, j-1
+        elif action == 'delete':
+            ops.append(('delete', None, i-1))
+            i -= 1
+        elif action == 'insert':
+            ops.append(('insert', arg, j-1))
+            j -= 1
+    ops.reverse()
+    return dp[m][n - m + k], ops
+
+def _levenshtein_path_matrix(source: str, target: str):
     m, n = len(source), len(target)
     dp = [[0] * (n + 1) for _ in range(m + 1)]
     op = [[None] * (n + 1) for _ in range(m + 1)]
@@ -85,12 +171,78 @@ def levenshtein_path(source: str, target: str):
     ops.reverse()
     return dp[m][n], ops
 
-def build_and_run(source: str, target: str):
-    Add, Delete, Swap, Move = define_pipeline_steps()
-    distance, ops = levenshtein_path(source, target)
-    print(f"Levenshtein-Distanz: {distance}")
-    print("Levenshtein-Operationen:", ops)
+class InsertAt(PipelineStep):
+    def __init__(self, index: int, letter: str):
+        self.index = index
+        self.letter = letter
+    def process(self, s: str) -> str:
+        return s[:self.index] + self.letter + s[self.index:]
+    def __repr__(self) -> str:
+        return f"InsertAt({self.index}, {self.letter})"
+
+class DeleteAt(PipelineStep):
+    def __init__(self, index: int):
+        self.index = index
+    def process(self, s: str) -> str:
+        return s[:self.index] + s[self.index + 1:]
+    def __repr__(self) -> str:
+        return f"DeleteAt({self.index})"
+
+class SubstituteAt(PipelineStep):
+    def __init__(self, index: int, letter: str):
+        self.index = index
+        self.letter = letter
+    def process(self, s: str) -> str:
+        return s[:self.index] + self.letter + s[self.index + 1:]
+    def __repr__(self) -> str:
+        return f"SubstituteAt({self.index}, {self.letter})"
 
+class Splice(PipelineStep):
+    # Ersetzt s[start:start+length] durch text – ein Schritt pro zusammenhängendem Bearbeitungsblock.
+    def __init__(self, start: int, length: int, text: str):
+        self.start = start
+        self.length = length
+        self.text = text
+    def process(self, s: str) -> str:
+        return s[:self.start] + self.text + s[self.start + self.length:]
+    def __repr__(self) -> str:
+        return f"Splice({self.start}, {self.length}, {self.text})"
+
+def build_positional_steps(ops, splice: bool = True) -> list:
+    # Die Operationen werden von links nach rechts angewendet: links der aktuellen
+    # Position steht schon der Zieltext, deshalb verschiebt offset die Quellindizes.
+    steps = []
+    offset = 0
+    run = None  # [start, length, text, end]
+    for action, arg, idx in ops:
+        pos = idx if action == 'insert' else idx + offset
+        if not splice:
+            if action == 'insert':
+                steps.append(InsertAt(pos, arg))
+            elif action == 'delete':
+                steps.append(DeleteAt(pos))
+            else:
+                steps.append(SubstituteAt(pos, arg))
+        else:
+            if run is None or run[3] != pos:
+                if run is not None:
+                    steps.append(Splice(run[0], run[1], run[2]))
+                run = [pos, 0, '', pos]
+            if action != 'insert':
+                run[1] += 1
+            if action != 'delete':
+                run[2] += arg
+                run[3] += 1
+        if action == 'insert':
+            offset += 1
+        elif action == 'delete':
+            offset -= 1
+    if run is not None:
+        steps.append(Splice(run[0], run[1], run[2]))
+    return steps
+
+def build_rotation_steps(source: str, target: str, ops) -> list:
+    Add, Delete, Swap, Move = define_pipeline_steps()
     current = source
     steps = []
     for action, arg, idx in ops:
@@ -109,10 +261,27 @@ def build_and_run(source: str, target: str):
             current = apply_moves(1, Move, steps, current)
             if current == target:
                 break
+    return steps
+
+def build_and_run(source: str, target: str, mode: str = 'splice'):
+    # mode: 'splice' (ein Schritt pro Block), 'positional' (ein Schritt pro Operation)
+    # oder 'rotation' (Add/Delete/Swap mit Move-Rotationen, für den Unterricht).
+    distance, ops = levenshtein_path(source, target)
+    print(f"Levenshtein-Distanz: {distance}")
+    print("Levenshtein-Operationen:", ops)
 
-    print("Pipeline steps with rotation:", steps)
-    pipeline = Pipeline(steps)
-    result = pipeline.run_chained(source)
+    if mode == 'rotation':
+        steps = build_rotation_steps(source, target, ops)
+        print("Pipeline steps with rotation:", steps)
+        pipeline = Pipeline(steps)
+        result = pipeline.run_chained(source)
+    elif mode in ('splice', 'positional'):
+        steps = build_positional_steps(ops, splice=(mode == 'splice'))
+        print(f"Pipeline steps ({mode}):", steps)
+        pipeline = Pipeline(steps)
+        result = pipeline.compile()(source)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
     assert result == target, f"Expected '{target}', got '{result}'"
     print("Transformation successful:", result)
     graph = pipeline.visualize("levenshtein_pipeline", format='png')
@@ -1,70 +1,141 @@
-import itertools
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from editDistance import encode_tokens, levenshtein
+from pathOrder import multi_start_order
 
-def levenshtein_words(s1, s2):
-    w1 = s1.split()
-    w2 = s2.split()
-    
-    dp = [[0] * (len(w2) + 1) for _ in range(len(w1) + 1)]
+_worker_tokens = None
 
-    for i in range(len(w1) + 1):
-        for j in range(len(w2) + 1):
-            if i == 0:
-                dp[i][j] = j
-            elif j == 0:
-                dp[i][j] = i
-            elif w1[i-1] == w2[j-1]:
-                dp[i][j] = dp[i-1][j-1]
-            else:
-                dp[i][j] = 1 + min(dp[i-1][j], dp[i][j-1], dp[i-1][j-1])
+def _init_worker(tokens):
+    global _worker_tokens
+    _worker_tokens = tokens
 
-    return dp[-1][-1]
+def _distance_rows(rows):
+    # Für jede Zeile i die Distanzen zu allen j > i (ein Block der oberen Dreiecksmatrix)
+    tokens = _worker_tokens
+    return [(i, np.array([levenshtein(tokens[i], tokens[j]) for j in range(i + 1, len(tokens))],
+                         dtype=np.int32))
+            for i in rows]
 
-def build_distance_cache(sentences):
-    cache = {}
-    for i, s1 in enumerate(sentences):
-        for j, s2 in enumerate(sentences):
-            if i < j:
-                dist = levenshtein_words(s1, s2)
-                cache[(i, j)] = dist
-                cache[(j, i)] = dist  # symmetrisch
-            elif i == j:
-                cache[(i, j)] = 0
+def condensed_index(n, i, j):
+    # Position von (i, j) in der komprimierten oberen Dreiecksmatrix (wie scipy.spatial.distance)
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+def build_distance_cache(sentences, condensed=False, processes=None):
+    # Symmetrische Distanzmatrix als NumPy-Array. Mit condensed=True nur die obere
+    # Dreiecksmatrix als Vektor der Länge n(n-1)/2 (halber Speicher bei großen n).
+    # Ab einigen hundert Sätzen werden die Zeilen auf mehrere Prozesse verteilt.
+    n = len(sentences)
+    vocab = {}
+    tokens = [encode_tokens(s.split(), vocab) for s in sentences]
+    flat = np.zeros(n * (n - 1) // 2, dtype=np.int32)
+    if processes is None:
+        processes = 1 if n < 300 else os.cpu_count() or 1
+    if processes > 1:
+        blocks = [range(k, n, 4 * processes) for k in range(4 * processes)]
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(tokens,)) as executor:
+            results = [row for rows in executor.map(_distance_rows, blocks) for row in rows]
+    else:
+        _init_worker(tokens)
+        results = _distance_rows(range(n))
+    for i, row in results:
+        start = condensed_index(n, i, i + 1) if i < n - 1 else 0
+        flat[start:start + len(row)] = row
+    if condensed:
+        return flat
+    cache = np.zeros((n, n), dtype=np.int32)
+    upper_i, upper_j = np.triu_indices(n, k=1)
+    cache[upper_i, upper_j] = flat
+    cache[upper_j, upper_i] = flat  # symmetrisch
     return cache
 
 def total_distance(order_indices, cache):
-    return sum(cache[(order_indices[i], order_indices[i+1])] for i in range(len(order_indices) - 1))
+    order = np.asarray(order_indices, dtype=np.int64)
+    if len(order) < 2:
+        return 0
+    a, b = order[:-1], order[1:]
+    if cache.ndim == 2:
+        return cache[a, b].sum()
+    n = int(round((1 + np.sqrt(1 + 8 * len(cache))) / 2))
+    return np.where(a == b, 0, cache[condensed_index(n, a, b) * (a != b)]).sum()
 
-def find_best_order(sentences):
-    n = len(sentences)
-    cache = build_distance_cache(sentences)
+def held_karp_order(dist, chunk_size=8192):
+    # Exakte Bitmasken-DP: best[mask, j] = kürzester Pfad durch mask, der bei j endet.
+    # Die Masken werden schichtweise nach Anzahl gesetzter Bits verarbeitet.
+    n = len(dist)
+    if n <= 1:
+        return list(range(n)), 0
+    masks = np.arange(1 << n, dtype=np.int64)
+    bits = ((masks[:, None] >> np.arange(n)) & 1).astype(bool)
+    popcount = bits.sum(axis=1)
+    best = np.full((1 << n, n), np.inf, dtype=np.float32)
+    best[1 << np.arange(n), np.arange(n)] = 0
+    dist32 = dist.astype(np.float32)
+    for size in range(1, n):
+        layer = masks[popcount == size]
+        for start in range(0, len(layer), chunk_size):
+            chunk = layer[start:start + chunk_size]
+            # extend[m, j] = min_i best[m, i] + dist[i, j]
+            extend = (best[chunk][:, :, None] + dist32[None, :, :]).min(axis=1)
+            for j in range(n):
+                free = ~bits[chunk, j]
+                targets = chunk[free] | (1 << j)
+                best[targets, j] = np.minimum(best[targets, j], extend[free, j])
 
-    best_order = None
-    min_distance = float('inf')
+    # Pfad rückwärts rekonstruieren
+    mask = (1 << n) - 1
+    last = int(np.argmin(best[mask]))
+    path = [last]
+    while mask != (1 << last):
+        prev_mask = mask ^ (1 << last)
+        candidates = best[prev_mask] + dist32[:, last]
+        candidates[~bits[prev_mask]] = np.inf
+        last, mask = int(np.argmin(candidates)), prev_mask
+        path.append(last)
+    path.reverse()
+    return path, total_distance(path, dist)
+
+def heuristic_order(dist, time_limit=1.0, n_starts=8):
+    # Nächster Nachbar von mehreren Startknoten, danach 2-opt und Or-opt (siehe pathOrder.py)
+    n = len(dist)
+    if n <= 1:
+        return list(range(n)), 0
+    starts = np.linspace(0, n - 1, min(n, n_starts)).astype(int)
+    path, cost = multi_start_order(dist, starts, time_limit)
+    return path, total_distance(path, dist)
+
+def find_best_order(sentences, exact_limit=20, time_limit=1.0):
+    # Bis exact_limit Sätze exakt (Held-Karp), darüber heuristisch mit Zeitbudget.
+    n = len(sentences)
+    dist = build_distance_cache(sentences)
 
-    for perm in itertools.permutations(range(n)):
-        dist = total_distance(perm, cache)
-        if dist < min_distance:
-            min_distance = dist
-            best_order = perm
+    if n <= exact_limit:
+        best_order, min_distance = held_karp_order(dist)
+        optimal = True
+    else:
+        best_order, min_distance = heuristic_order(dist, time_limit)
+        optimal = False
 
-    return [sentences[i] for i in best_order], min_distance
+    return [sentences[i] for i in best_order], min_distance, optimal
 
-# Beispiel-Sätze (in zufälliger Reihenfolge):
-sentences = [
-    "Der Hund läuft schnell",
-    "Der schwarze Hund läuft schnell",
-    "Ein schwarzer Hund läuft schnell",
-    "Ein schwarzer Hund läuft sehr schnell",
-    "Ein großer schwarzer Hund läuft sehr schnell",
-    "Ein großer schwarzer Hund läuft sehr schnell durch den Park",
-    "Ein großer schwarzer Hund rennt sehr schnell durch den Park",
-    "Ein großer schwarzer Hund rennt blitzschnell durch den Park",
-    "Ein großer schwarzer Hund rennt blitzschnell durch den grünen Park",
-    "Ein großer schwarzer Hund rennt blitzschnell durch einen grünen Park"
-]
+if __name__ == "__main__":
+    # Beispiel-Sätze (in zufälliger Reihenfolge):
+    sentences = [
+        "Der Hund läuft schnell",
+        "Der schwarze Hund läuft schnell",
+        "Ein schwarzer Hund läuft schnell",
+        "Ein schwarzer Hund läuft sehr schnell",
+        "Ein großer schwarzer Hund läuft sehr schnell",
+        "Ein großer schwarzer Hund läuft sehr schnell durch den Park",
+        "Ein großer schwarzer Hund rennt sehr schnell durch den Park",
+        "Ein großer schwarzer Hund rennt blitzschnell durch den Park",
+        "Ein großer schwarzer Hund rennt blitzschnell durch den grünen Park",
+        "Ein großer schwarzer Hund rennt blitzschnell durch einen grünen Park"
+    ]
 
-best_order, min_dist = find_best_order(sentences)
-print("Minimale Gesamtdistanz:", min_dist)
-print("Rekonstruierte Reihenfolge:")
-for i, s in enumerate(best_order):
-    print(f"{i+1}. {s}")
+    best_order, min_dist, optimal = find_best_order(sentences)
+    print("Minimale Gesamtdistanz:", min_dist, "(optimal)" if optimal else "(heuristisch)")
+    print("Rekonstruierte Reihenfolge:")
+    for i, s in enumerate(best_order):
+        print(f"{i+1}. {s}")
@@ -1,73 +1,345 @@
-import itertools
+from collections import Counter
+import numpy as np
 import networkx as nx
 from graphviz import Digraph
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.neighbors import NearestNeighbors
+from editDistance import levenshtein, levenshtein_bounded
 
-# 1. Beispiel-Sätze definieren
-sentences = [
-    "The quick brown fox jumps over the lazy dog.",
-    "A swift auburn fox leaps over a sleepy canine.",
-    "The quick brown fox hopped over the lazy dog.",
-    "A fast brown fox jumps above the lazy hound.",
-    "The agile brown fox vaults over the lethargic dog.",
-    "A quick brown fox jumps over the lazy dog!",
-    "The quick brown fox jumps over the lazy cat.",
-    "A swift auburn fox hops over a sleepy dog.",
-    "The quick brown fox jumped over the lazy dog.",
-    "A fast brown fox hopped above the lazy dog."
-]
-
-# 2. Levenshtein-Distanz-Funktion
-
-def levenshtein(a: str, b: str) -> int:
+# Bis zu dieser Satzanzahl werden alle Paare berechnet, darüber nur Kanten unter einer Schranke
+EXACT_LIMIT = 2000
+
+
+# 2. Distanzen aller Paare als kondensiertes Array (Levenshtein bit-parallel, siehe editDistance.py)
+def condensed_distances(sentences):
+    n = len(sentences)
+    condensed = np.empty(n * (n - 1) // 2, dtype=np.int32)
+    pos = 0
+    for i in range(n - 1):
+        row = [levenshtein(sentences[i], sentences[j]) for j in range(i + 1, n)]
+        condensed[pos:pos + len(row)] = row
+        pos += len(row)
+    return condensed
+
+
+def _mst_edges(rows, cols, weights, n):
+    """
+    MST über eine Kantenliste mit scipy.sparse.csgraph.
+    csgraph behandelt Gewicht 0 als fehlende Kante; da jeder Spannbaum n-1 Kanten
+    hat, ändert ein konstanter Offset von +1 den MST nicht.
+    """
+    graph = coo_matrix((np.asarray(weights, dtype=np.float64) + 1, (rows, cols)), shape=(n, n))
+    tree = minimum_spanning_tree(graph.tocsr()).tocoo()
+    return [(int(u), int(v), int(round(w)) - 1) for u, v, w in zip(tree.row, tree.col, tree.data)]
+
+
+# 3. Minimalen Spannbaum (MST) exakt auf allen Paaren berechnen
+def exact_mst(condensed, n):
+    rows, cols = np.triu_indices(n, k=1)
+    return _mst_edges(rows, cols, condensed, n)
+
+
+def bottleneck_levels(edges, n):
+    """
+    Komponenten-Labels nach Kruskal: labels[l] gehört zum Zustand, nachdem alle
+    Baumkanten mit Gewicht <= levels[l] eingefügt wurden. Das kleinste l mit
+    labels[l][i] == labels[l][j] liefert die größte Kante auf dem Baumpfad i -> j.
     """
-    Berechnet die Levenshtein-Distanz zwischen zwei Strings.
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    levels, labels = [], []
+    edges = sorted(edges, key=lambda e: e[2])
+    for k, (u, v, w) in enumerate(edges):
+        parent[find(u)] = find(v)
+        # Labels nur nach der letzten Kante eines Gewichts festhalten
+        if k + 1 == len(edges) or edges[k + 1][2] != w:
+            levels.append(w)
+            labels.append([find(x) for x in range(n)])
+    return levels, np.array(labels, dtype=np.int64).reshape(len(levels), n)
+
+
+def char_histograms(sentences):
+    """Zeichenhäufigkeiten aller Sätze als Matrix (Sätze x Alphabet)."""
+    alphabet = {c: col for col, c in enumerate(sorted(set().union(*sentences)))}
+    hist = np.zeros((len(sentences), len(alphabet)), dtype=np.int32)
+    for i, s in enumerate(sentences):
+        for c, count in Counter(s).items():
+            hist[i, alphabet[c]] = count
+    return hist
+
+
+def pivot_distances(sentences, n_pivots):
+    """
+    Exakte Distanzen zu n_pivots Referenzsätzen (Farthest-First-Auswahl, damit
+    jede Gruppe ähnlicher Sätze einen Pivot in der Nähe hat).
+    """
+    pivots = [0]
+    rows = [[levenshtein(sentences[0], s) for s in sentences]]
+    nearest = np.array(rows[0])
+    while len(pivots) < min(n_pivots, len(sentences)):
+        p = int(np.argmax(nearest))
+        if nearest[p] == 0:
+            break
+        pivots.append(p)
+        rows.append([levenshtein(sentences[p], s) for s in sentences])
+        nearest = np.minimum(nearest, rows[-1])
+    return pivots, np.array(rows, dtype=np.int64)
+
+
+def lower_bounds(i, js, hist, pivot_dist=None):
+    """
+    Untere Schranke von Satz i zu den Sätzen js: Histogramm-Schranke (umfasst die
+    Längendifferenz) und Dreiecksungleichung über die Pivots.
+    """
+    diff = hist[js] - hist[i]
+    surplus = np.clip(diff, 0, None).sum(axis=1)
+    deficit = np.clip(-diff, 0, None).sum(axis=1)
+    bound = np.maximum(surplus, deficit)
+    if pivot_dist is not None:
+        bound = np.maximum(bound, np.abs(pivot_dist[:, js] - pivot_dist[:, [i]]).max(axis=0))
+    return bound
+
+
+# 4. Exakter MST mit wachsender Schranke (Borůvka)
+def bounded_mst(sentences, start=2, n_pivots=16):
+    """
+    Borůvka-Runden: Jede Komponente sucht ihre günstigste ausgehende Kante.
+    Kandidaten werden nach unterer Schranke (Länge, Histogramm, Pivots) sortiert und
+    beschränkt berechnet, die Schranke sinkt auf die beste bisher gefundene
+    Kante. Der erste Durchlauf nutzt k = start und findet nahe Varianten fast
+    ohne DP; scheitert er, wächst k auf die exakte Distanz des Kandidaten mit der
+    kleinsten unteren Schranke. Weit entfernte Paare brechen so früh ab, nur
+    plausible Baumkanten werden voll berechnet. Ergebnisse (auch bewiesene
+    untere Schranken) werden über die Runden hinweg gemerkt.
+
+    Gibt (Kanten, Anzahl gestarteter DP-Berechnungen) zurück.
     """
-    m, n = len(a), len(b)
-    dp = [[0] * (n + 1) for _ in range(m + 1)]
-    for i in range(m + 1): dp[i][0] = i
-    for j in range(n + 1): dp[0][j] = j
-    for i in range(1, m + 1):
-        for j in range(1, n + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            dp[i][j] = min(
-                dp[i - 1][j] + 1,      # Einfügen
-                dp[i][j - 1] + 1,      # Löschen
-                dp[i - 1][j - 1] + cost # Ersetzen
-            )
-    return dp[m][n]
-
-# 3. Distanzen aller Paare berechnen
-pairs = list(itertools.combinations(range(len(sentences)), 2))
-distances = {(i, j): levenshtein(sentences[i], sentences[j]) for i, j in pairs}
-
-# 4. Graph aufbauen und Gewichte setzen
-G = nx.Graph()
-for i, s in enumerate(sentences):
-    G.add_node(i, label=s)
-for (i, j), w in distances.items():
-    G.add_edge(i, j, weight=w)
-
-# 5. Minimalen Spannbaum (MST) berechnen
-T = nx.minimum_spanning_tree(G, weight='weight')
+    n = len(sentences)
+    if n < 2:
+        return [], 0
+    hist = char_histograms(sentences)
+    pivots, pivot_dist = pivot_distances(sentences, n_pivots)
+    parent = list(range(n))
+    # Paar -> (Distanz, True) oder (bewiesene untere Schranke, False)
+    known = {(min(p, j), max(p, j)): (int(d), True)
+             for p, row in zip(pivots, pivot_dist) for j, d in enumerate(row) if j != p}
+    computed = len(pivots) * n
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def distance(i, j, limit):
+        nonlocal computed
+        value, exact = known.get((i, j), (0, False))
+        if exact:
+            return value if limit is None or value <= limit else None
+        if limit is not None and value > limit:
+            return None
+        computed += 1
+        if limit is None:
+            d = levenshtein(sentences[i], sentences[j])
+        else:
+            d = levenshtein_bounded(sentences[i], sentences[j], limit, prefiltered=True)
+        known[(i, j)] = (limit + 1, False) if d is None else (d, True)
+        return d
+
+    def scan(cand_i, cand_j, bounds, limit, edge=None):
+        for i, j, lb in zip(cand_i, cand_j, bounds):
+            if edge is not None:
+                limit = edge[0]
+            if lb > limit:
+                break
+            i, j = int(min(i, j)), int(max(i, j))
+            d = distance(i, j, limit)
+            if d is not None and (edge is None or (d, i, j) < edge):
+                edge = (d, i, j)
+        return edge
+
+    edges = []
+    while len(edges) < n - 1:
+        labels = np.array([find(x) for x in range(n)])
+        best = {}
+        for c in np.unique(labels):
+            members = np.flatnonzero(labels == c)
+            others = np.flatnonzero(labels != c)
+            cand_i = np.repeat(members, len(others))
+            cand_j = np.tile(others, len(members))
+            bounds = np.concatenate([lower_bounds(i, others, hist, pivot_dist) for i in members])
+            order = np.argsort(bounds, kind='stable')
+            cand_i, cand_j, bounds = cand_i[order], cand_j[order], bounds[order]
+            edge = scan(cand_i, cand_j, bounds, start)
+            if edge is None:
+                i, j = int(min(cand_i[0], cand_j[0])), int(max(cand_i[0], cand_j[0]))
+                edge = scan(cand_i, cand_j, bounds, None, (distance(i, j, None), i, j))
+            best[c] = edge
+        # Gleiche Gewichte werden über (d, i, j) eindeutig, Zyklen verhindert find()
+        for d, i, j in sorted(set(best.values())):
+            if find(i) != find(j):
+                parent[find(i)] = find(j)
+                edges.append((i, j, d))
+    return edges, computed
+
+
+# 5. MST über einen k-NN-Kandidatengraphen, anschließend exakt verifiziert
+def knn_mst(sentences, k=10, verify=True, n_pivots=16):
+    """
+    Kandidatenkanten sind die k nächsten Nachbarn über Zeichen-3-Gramm-TF-IDF;
+    nur für diese wird die Levenshtein-Distanz berechnet.
+
+    Verifikation (Kreiseigenschaft): Ein fehlendes Paar (i, j) kann nur dann in
+    den echten MST gehören, wenn d(i, j) kleiner ist als die größte Kante auf dem
+    Pfad i -> j im Kandidaten-MST. Paare, deren untere Schranke diese Grenze
+    schon erreicht, fallen weg, alle anderen werden beschränkt berechnet.
+    Nach Aufnahme der gefundenen Kanten ist der MST exakt. Mit verify=False
+    bleibt es beim (approximativen) MST des Kandidatengraphen; ist dieser nicht
+    zusammenhängend, ist das Ergebnis ein Spannwald.
+
+    Gibt (Kanten, Anzahl berechneter Distanzen) zurück.
+    """
+    n = len(sentences)
+    if n < 2:
+        return [], 0
+    vectors = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3)).fit_transform(sentences)
+    k = min(k, n - 1)
+    _, neighbours = NearestNeighbors(n_neighbors=k + 1, metric='cosine').fit(vectors).kneighbors(vectors)
+
+    weights = {}
+    for i, row in enumerate(neighbours):
+        for j in row:
+            j = int(j)
+            if i != j:
+                pair = (min(i, j), max(i, j))
+                if pair not in weights:
+                    weights[pair] = levenshtein(sentences[pair[0]], sentences[pair[1]])
+    computed = len(weights)
+
+    def mst_from_weights():
+        pairs = np.array(list(weights), dtype=np.int64)
+        return _mst_edges(pairs[:, 0], pairs[:, 1], list(weights.values()), n)
+
+    edges = mst_from_weights()
+    if not verify:
+        return edges, computed
+    levels, labels = bottleneck_levels(edges, n)
+
+    added = 0
+    lengths = np.array([len(s) for s in sentences])
+    hist = char_histograms(sentences)
+    _, pivot_dist = pivot_distances(sentences, n_pivots)
+    computed += len(pivot_dist) * n
+    for i in range(n - 1):
+        js = np.arange(i + 1, n)
+        # Pfad-Maximum im Kandidaten-MST, unendlich zwischen getrennten Komponenten
+        bound = np.full(len(js), np.inf)
+        for level, label in zip(levels, labels):
+            bound[np.isinf(bound) & (label[js] == label[i])] = level
+        keep = np.abs(lengths[js] - lengths[i]) < bound
+        js, bound = js[keep], bound[keep]
+        if len(js):
+            keep = lower_bounds(i, js, hist, pivot_dist) < bound
+            js, bound = js[keep], bound[keep]
+        for j, b in zip(js, bound):
+            j = int(j)
+            if (i, j) in weights:
+                continue
+            computed += 1
+            if np.isinf(b):
+                d = levenshtein(sentences[i], sentences[j])
+            else:
+                d = levenshtein_bounded(sentences[i], sentences[j], int(b) - 1, prefiltered=True)
+            if d is not None:
+                weights[(i, j)] = d
+                added += 1
+    if added:
+        edges = mst_from_weights()
+    return edges, computed
+
 
 # 6. Wurzel auswählen (Minimale Summe der Distanzen)
-sum_dist = {i: sum(distances.get(tuple(sorted((i, j))), 0) for j in G.neighbors(i)) for i in G.nodes}
-root = min(sum_dist, key=sum_dist.get)
-
-# 7. Kanten Richtung root -> Blätter ausrichten
-dir_edges = list(nx.bfs_edges(T, root))
-
-# 8. MST mit Graphviz visualisieren
-dot = Digraph(name='Minimaler Veränderungsbaum', format='png')
-for i in T.nodes():
-    # Label: Index und Text (ggf. abschneiden)
-    label = f"{i}: {sentences[i]}"
-    dot.node(str(i), label)
-for u, v in dir_edges:
-    w = T[u][v]['weight']
-    dot.edge(str(u), str(v), label=str(w))
-
-# Ausgabe
-output_path = dot.render(filename='sentence_mst', cleanup=True)
-print(f"Graphviz-Datei erstellt: {output_path}")
-print(dot.source)
+def choose_root(condensed, n):
+    rows, cols = np.triu_indices(n, k=1)
+    sum_dist = np.bincount(rows, condensed, minlength=n) + np.bincount(cols, condensed, minlength=n)
+    return int(np.argmin(sum_dist))
+
+
+def tree_medoid(edges, n):
+    """
+    Knoten mit minimaler Summe der Baumdistanzen, in O(n) per Rerooting.
+    Ersatz für choose_root, wenn nicht alle Paardistanzen bekannt sind.
+    """
+    T = nx.Graph()
+    T.add_nodes_from(range(n))
+    T.add_weighted_edges_from(edges)
+    order = [0] + [v for _, v in nx.bfs_edges(T, 0)]
+    parent = dict((v, u) for u, v in nx.bfs_edges(T, 0))
+    size = dict.fromkeys(order, 1)
+    down = dict.fromkeys(order, 0)
+    for v in reversed(order[1:]):
+        u = parent[v]
+        size[u] += size[v]
+        down[u] += down[v] + T[u][v]['weight'] * size[v]
+    total = {0: down[0]}
+    for v in order[1:]:
+        u = parent[v]
+        total[v] = total[u] + T[u][v]['weight'] * (n - 2 * size[v])
+    return min(total, key=total.get)
+
+
+if __name__ == '__main__':
+    # 1. Beispiel-Sätze definieren
+    sentences = [
+        "The quick brown fox jumps over the lazy dog.",
+        "A swift auburn fox leaps over a sleepy canine.",
+        "The quick brown fox hopped over the lazy dog.",
+        "A fast brown fox jumps above the lazy hound.",
+        "The agile brown fox vaults over the lethargic dog.",
+        "A quick brown fox jumps over the lazy dog!",
+        "The quick brown fox jumps over the lazy cat.",
+        "A swift auburn fox hops over a sleepy dog.",
+        "The quick brown fox jumped over the lazy dog.",
+        "A fast brown fox hopped above the lazy dog."
+    ]
+    n = len(sentences)
+
+    if n <= EXACT_LIMIT:
+        condensed = condensed_distances(sentences)
+        edges = exact_mst(condensed, n)
+        root = choose_root(condensed, n)
+    else:
+        edges, _ = bounded_mst(sentences)
+        root = tree_medoid(edges, n)
+
+    # 7. Nur der Baum (n-1 Kanten) wird als networkx-Graph aufgebaut
+    T = nx.Graph()
+    for i, s in enumerate(sentences):
+        T.add_node(i, label=s)
+    T.add_weighted_edges_from(edges)
+
+    # 8. Kanten Richtung root -> Blätter ausrichten
+    dir_edges = list(nx.bfs_edges(T, root))
+
+    # 9. MST mit Graphviz visualisieren
+    dot = Digraph(name='Minimaler Veränderungsbaum', format='png')
+    for i in T.nodes():
+        # Label: Index und Text (ggf. abschneiden)
+        label = f"{i}: {sentences[i]}"
+        dot.node(str(i), label)
+    for u, v in dir_edges:
+        w = T[u][v]['weight']
+        dot.edge(str(u), str(v), label=str(w))
+
+    # Ausgabe
+    output_path = dot.render(filename='sentence_mst', cleanup=True)
+    print(f"Graphviz-Datei erstellt: {output_path}")
+    print(dot.source)
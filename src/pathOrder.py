@@ -0,0 +1,109 @@
+"""
+Heuristiken für kurze offene Pfade durch alle Knoten einer Distanzmatrix
+(offenes TSP): nächster Nachbar, 2-opt und Or-opt mit Zeitbudget.
+Ein Dummy-Knoten mit Distanz 0 zu allen macht aus dem offenen Pfad eine Rundreise,
+so dass auch die Enden des Pfads verschoben werden können.
+"""
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+def path_cost(dist, path):
+    path = np.asarray(path, dtype=np.int64)
+    return dist[path[:-1], path[1:]].sum() if len(path) > 1 else 0
+
+def nearest_neighbour_order(dist, start):
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    path = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[path[-1]])
+        nxt = int(np.argmin(row))
+        path.append(nxt)
+        visited[nxt] = True
+    return path
+
+def _two_opt_pass(padded, tour, deadline):
+    # tour beginnt und endet mit dem Dummy-Knoten, der zu allen Distanz 0 hat
+    improved = False
+    for i in range(1, len(tour) - 2):
+        if time.monotonic() > deadline:
+            break
+        a, b = tour[i - 1], tour[i]
+        c, d = tour[i + 1:-1], tour[i + 2:]
+        delta = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+        j = int(np.argmin(delta))
+        if delta[j] < -1e-9:
+            tour[i:i + j + 2] = tour[i:i + j + 2][::-1].copy()
+            improved = True
+    return improved
+
+def _or_opt_pass(padded, tour, deadline, max_segment=3):
+    improved = False
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length < len(tour):
+            if time.monotonic() > deadline:
+                return improved
+            seg = tour[i:i + length]
+            prev, nxt = tour[i - 1], tour[i + length]
+            gain = padded[prev, seg[0]] + padded[seg[-1], nxt] - padded[prev, nxt]
+            rest = np.concatenate([tour[:i], tour[i + length:]])
+            left, right = rest[:-1], rest[1:]
+            base = padded[left, right]
+            forward = padded[left, seg[0]] + padded[seg[-1], right] - base
+            backward = padded[left, seg[-1]] + padded[seg[0], right] - base
+            k_fwd, k_bwd = int(np.argmin(forward)), int(np.argmin(backward))
+            if min(forward[k_fwd], backward[k_bwd]) < gain - 1e-9:
+                if forward[k_fwd] <= backward[k_bwd]:
+                    k, seg = k_fwd, seg.copy()
+                else:
+                    k, seg = k_bwd, seg[::-1].copy()
+                tour[:] = np.concatenate([rest[:k + 1], seg, rest[k + 1:]])
+                improved = True
+            i += 1
+    return improved
+
+def improve_path(dist, path, deadline):
+    n = len(dist)
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = dist
+    tour = np.array([n] + list(path) + [n])
+    while time.monotonic() < deadline:
+        improved = _two_opt_pass(padded, tour, deadline)
+        improved = _or_opt_pass(padded, tour, deadline) or improved
+        if not improved:
+            break
+    return [int(v) for v in tour[1:-1]]
+
+_worker_dist = None
+
+def _init_worker(dist):
+    global _worker_dist
+    _worker_dist = dist
+
+def _order_from_start(start, time_limit):
+    deadline = time.monotonic() + time_limit
+    path = improve_path(_worker_dist, nearest_neighbour_order(_worker_dist, start), deadline)
+    return path_cost(_worker_dist, path), path
+
+def multi_start_order(dist, starts, time_limit=1.0, processes=None):
+    # Jeder Startknoten: nächster Nachbar + Verbesserung mit eigenem Zeitbudget,
+    # die Starts laufen parallel; zurück kommt der kürzeste Pfad und seine Länge.
+    n = len(dist)
+    if n <= 1:
+        return list(range(n)), 0
+    starts = [int(s) for s in starts]
+    if processes is None:
+        processes = min(len(starts), os.cpu_count() or 1)
+    if processes > 1:
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(dist,)) as executor:
+            results = list(executor.map(_order_from_start, starts, [time_limit] * len(starts)))
+    else:
+        # seriell teilen sich die Starts das Zeitbudget
+        _init_worker(dist)
+        results = [_order_from_start(s, time_limit / len(starts)) for s in starts]
+    cost, path = min(results, key=lambda r: r[0])
+    return path, cost
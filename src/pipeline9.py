@@ -1,48 +1,66 @@
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional
 from abc import ABC, abstractmethod
-import random
+from collections import deque
+import itertools
+import time
 from graphviz import Digraph
 
 class PipelineStep(ABC):
     @abstractmethod
     def process(self, s: str) -> str:
         pass
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [self.process(s) for s in batch]
     def __repr__(self) -> str:
         return self.__class__.__name__
 
 class ToLower(PipelineStep):
     def process(self, s: str) -> str:
         return s.lower()
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return list(map(str.lower, batch))
 
 class ToCapitalize(PipelineStep):
     def process(self, s: str) -> str:
         return s.capitalize()
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return list(map(str.capitalize, batch))
 
 class ReverseString(PipelineStep):
     def process(self, s: str) -> str:
         return s[::-1]
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [s[::-1] for s in batch]
 
 class RemoveLastChar(PipelineStep):
     def process(self, s: str) -> str:
         return s[:-1] if s else s
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [s[:-1] for s in batch]
 
 class SwapFirstLast(PipelineStep):
     def process(self, s: str) -> str:
         if len(s) < 2:
             return s
         return s[-1] + s[1:-1] + s[0]
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [s[-1] + s[1:-1] + s[0] if len(s) > 1 else s for s in batch]
 
 class DoubleLastChar(PipelineStep):
     def process(self, s: str) -> str:
         if not s:
             return s
         return s + s[-1]
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [s + s[-1:] for s in batch]
 
 class LastBecomesFirst(PipelineStep):
     def process(self, s: str) -> str:
         if len(s) < 2:
             return s
         return s[-1] + s[:-1]
+    def process_batch(self, batch: List[str]) -> List[str]:
+        return [s[-1:] + s[:-1] for s in batch]
 
 class MakeAppender(PipelineStep):
     def __init__(self, letter: str):
@@ -50,9 +68,91 @@ class MakeAppender(PipelineStep):
 
     def process(self, s: str) -> str:
         return s + self.letter
+    def process_batch(self, batch: List[str]) -> List[str]:
+        letter = self.letter
+        return [s + letter for s in batch]
     def __repr__(self) -> str:
         return f"MakeAppender({self.letter})"
 
+class CaseChain(PipelineStep):
+    # Bei ASCII-Text entspricht eine Folge von ToLower/ToCapitalize ihrem letzten Schritt,
+    # bei anderem Text (z.B. 'İ', 'ß') werden alle Schritte ausgeführt.
+    def __init__(self, steps: List[PipelineStep]):
+        self.steps = steps
+        self.last = steps[-1]
+
+    def process(self, s: str) -> str:
+        if s.isascii():
+            return self.last.process(s)
+        for step in self.steps:
+            s = step.process(s)
+        return s
+    def process_batch(self, batch: List[str]) -> List[str]:
+        if all(s.isascii() for s in batch):
+            return self.last.process_batch(batch)
+        for step in self.steps:
+            batch = step.process_batch(batch)
+        return batch
+    def __repr__(self) -> str:
+        return f"CaseChain({', '.join(map(repr, self.steps))})"
+
+class CompiledPipeline(PipelineStep):
+    def __init__(self, steps: List[PipelineStep]):
+        self.steps = steps
+        self._funcs = tuple(step.process for step in steps)
+
+    def process(self, s: str) -> str:
+        for func in self._funcs:
+            s = func(s)
+        return s
+
+    def process_batch(self, batch: List[str]) -> List[str]:
+        for step in self.steps:
+            batch = step.process_batch(batch)
+        return batch
+
+    def __call__(self, s: str) -> str:
+        return self.process(s)
+    def __repr__(self) -> str:
+        return " -> ".join(map(repr, self.steps))
+
+def _fuse_pair(first: PipelineStep, second: PipelineStep):
+    # Gibt eine Liste zurück, die das Paar ersetzt, oder None, wenn nichts verschmolzen wird.
+    if type(first) is ReverseString and type(second) is ReverseString:
+        return []
+    if type(first) is MakeAppender and type(second) is MakeAppender:
+        return [MakeAppender(first.letter + second.letter)]
+    case_steps = (ToLower, ToCapitalize, CaseChain)
+    if type(first) in case_steps and type(second) in case_steps:
+        chain = (first.steps if type(first) is CaseChain else [first]) + \
+                (second.steps if type(second) is CaseChain else [second])
+        if all(type(step) is ToLower for step in chain):
+            return [chain[0]]
+        return [CaseChain(chain)]
+    return None
+
+def _step_key(step: PipelineStep):
+    # Schritte gleicher Klasse mit gleichen (hashbaren) Attributen verhalten sich gleich.
+    if isinstance(step, Pipeline):
+        return id(step)
+    try:
+        key = (type(step), tuple(sorted(vars(step).items())))
+        hash(key)
+    except TypeError:
+        return id(step)
+    return key
+
+def fuse_steps(steps: List[PipelineStep]) -> List[PipelineStep]:
+    fused: List[PipelineStep] = []
+    for step in steps:
+        replacement = _fuse_pair(fused[-1], step) if fused else None
+        if replacement is None:
+            fused.append(step)
+        else:
+            fused.pop()
+            fused.extend(replacement)
+    return fused
+
 class Pipeline(PipelineStep):
     def __init__(self, steps: List[PipelineStep]):
         self.original_steps = steps.copy()
@@ -72,20 +172,75 @@ class Pipeline(PipelineStep):
             print(current)
         return current
 
-    def train_chain(self, source: str, target: str) -> List[PipelineStep]:
-        attempts = 0
+    def process_batch(self, batch: List[str]) -> List[str]:
+        for step in self.steps:
+            batch = step.process_batch(batch)
+        return batch
+
+    def run_many(self, strings: Iterable[str], batch_size: int = 1024) -> Iterator[str]:
+        # Verarbeitet die Eingabe blockweise und lazy, ohne Ausgabe pro Schritt.
+        iterator = iter(strings)
         while True:
-            attempts += 1
-            permuted = self.original_steps.copy()
-            random.shuffle(permuted)
-            result = source
-            for step in permuted:
-                result = step.process(result)
-            if result == target:
-                self.steps = permuted
-                print(f"Gefundene Schrittfolge nach {attempts} Versuchen")
-                return permuted
-            print(f"Training: Im {attempts} Versuch lautet das Ergebnis: {result}.")
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield from self.process_batch(batch)
+
+    def train_chain(self, source: str, target: str, strategy: str = 'dfs',
+                    max_attempts: Optional[int] = None,
+                    time_limit: Optional[float] = None) -> Optional[List[PipelineStep]]:
+        # Systematische Suche über alle Reihenfolgen von original_steps.
+        # Ein Zustand ist (noch verfügbare Schritte, aktueller String); gleiche
+        # Zustände werden nur einmal weiterverfolgt, gleichartige Schritte sind austauschbar.
+        if strategy not in ('dfs', 'bfs'):
+            raise ValueError(f"Unknown strategy: {strategy}")
+        groups = {}
+        for step in self.original_steps:
+            groups.setdefault(_step_key(step), []).append(step)
+        groups = list(groups.values())
+        funcs = [(g[0].compile() if isinstance(g[0], Pipeline) else g[0]).process for g in groups]
+
+        start = (tuple(len(g) for g in groups), source)
+        parents = {start: None}
+        frontier = deque([start])
+        pop = frontier.pop if strategy == 'dfs' else frontier.popleft
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        attempts = 0
+        while frontier:
+            state = pop()
+            remaining, current = state
+            if not any(remaining):
+                if current == target:
+                    found = self._steps_from_search(parents, state, groups)
+                    self.steps = found
+                    print(f"Gefundene Schrittfolge nach {attempts} Versuchen")
+                    return found
+                continue
+            children = []
+            for g, count in enumerate(remaining):
+                if not count:
+                    continue
+                if (max_attempts is not None and attempts >= max_attempts) or \
+                        (deadline is not None and time.monotonic() > deadline):
+                    print(f"Training abgebrochen nach {attempts} Versuchen (Budget erschöpft).")
+                    return None
+                attempts += 1
+                child = (remaining[:g] + (count - 1,) + remaining[g + 1:], funcs[g](current))
+                if child not in parents:
+                    parents[child] = (state, g)
+                    children.append(child)
+            frontier.extend(reversed(children) if strategy == 'dfs' else children)
+        print(f"Keine Schrittfolge gefunden ({attempts} Versuche).")
+        return None
+
+    @staticmethod
+    def _steps_from_search(parents, state, groups) -> List[PipelineStep]:
+        group_order = []
+        while parents[state] is not None:
+            state, g = parents[state]
+            group_order.append(g)
+        pools = [list(g) for g in groups]
+        return [pools[g].pop(0) for g in reversed(group_order)]
 
     def visualize(self, filename: str = None, format: str = 'png') -> Digraph:
         graph = Digraph(format=format)
@@ -112,6 +267,20 @@ class Pipeline(PipelineStep):
             graph.render(filename, cleanup=True)
         return graph
 
+    def flatten(self) -> List[PipelineStep]:
+        flat = []
+        for step in self.steps:
+            if isinstance(step, Pipeline):
+                flat.extend(step.flatten())
+            else:
+                flat.append(step)
+        return flat
+
+    def compile(self) -> Callable[[str], str]:
+        # Verschachtelte Pipelines werden aufgelöst und benachbarte Schritte verschmolzen;
+        # das Ergebnis entspricht run_chained, aber ohne Ausgabe pro Schritt.
+        return CompiledPipeline(fuse_steps(self.flatten()))
+
     def process(self, s: str) -> str:
         return self.run_chained(s)
     def __repr__(self) -> str:
@@ -142,6 +311,11 @@ if __name__ == "__main__":
     print("\n=== Pipeline: verkettet ===")
     pipeline.run_chained(word)
 
+    print("\n=== Pipeline: kompiliert ===")
+    compiled = pipeline.compile()
+    print(compiled)
+    print(compiled(word))
+
     print("\n=== Pipeline: trainiert ===")
     pipeline.train_chain(word,target)
     pipeline.run_chained(word)
@@ -2,8 +2,13 @@
 
 from pipeline9 import MakeAppender, Pipeline, PipelineStep
 import random
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 import math
+import os
+import itertools
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 class SeveralRunsPipeline(Pipeline):
     def __init__(self, steps: List[PipelineStep], runs: int = 1):
@@ -19,6 +24,14 @@ class SeveralRunsPipeline(Pipeline):
                 current = step.process(current)
         return current
 
+    def process_batch(self, batch: List[str]) -> List[str]:
+        for run_idx in range(self.runs):
+            batch = super().process_batch(batch)
+        return batch
+
+    def flatten(self) -> List[PipelineStep]:
+        return super().flatten() * self.runs
+
     def run_independent(self, s: str) -> List[str]:
         results = []
         for step in self.original_steps:
@@ -66,6 +79,53 @@ class DecayPipelineStep(PipelineStep):
             for i, c in enumerate(text)
         )
 
+_worker_pipeline = None
+
+def _init_worker(pickled_pipeline: bytes) -> None:
+    global _worker_pipeline
+    _worker_pipeline = pickle.loads(pickled_pipeline)
+
+def _run_chunk(seed: Optional[int], chunk_idx: int, chunk: List[str]) -> List[str]:
+    # Der Seed hängt nur vom Block ab, nicht vom Worker: gleiche Eingabe,
+    # gleicher Seed -> gleiches Ergebnis, unabhängig von der Anzahl der Prozesse.
+    if seed is not None:
+        random.seed(f"{seed}-{chunk_idx}")
+    return _worker_pipeline.process_batch(chunk)
+
+class ParallelPipelineRunner:
+    def __init__(self, pipeline: Pipeline, max_workers: Optional[int] = None,
+                 chunk_size: int = 1000, seed: Optional[int] = None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive.")
+        self.pipeline = pipeline
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+    def run_many(self, strings: Iterable[str]) -> Iterator[str]:
+        pickled = pickle.dumps(self.pipeline)
+        iterator = iter(strings)
+        workers = self.max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(pickled,)) as executor:
+            # Nur begrenzt viele Blöcke gleichzeitig in Arbeit halten, damit
+            # auch sehr große Eingaben nicht komplett im Speicher landen.
+            max_pending = 2 * workers
+            pending = deque()
+            for chunk_idx in itertools.count():
+                chunk = list(itertools.islice(iterator, self.chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_run_chunk, self.seed, chunk_idx, chunk))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def run(self, strings: Iterable[str]) -> List[str]:
+        return list(self.run_many(strings))
+
 def remaining_fraction_of_letter(text: str, letter: str = 'e') -> float:
     if not text:
         return 0.0
@@ -219,5 +279,15 @@ def check_decay_pipeline_step():
         comparer=make_compare_pipeline_results_percentage_of_letter('_')
     )
 
+def check_parallel_runner():
+    steps = [DecayPipelineStep(decay_char='_', decay_rate=0.1)]
+    pipeline = SeveralRunsPipeline(steps, runs=3)
+    inputs = ["This is an example sentence to test the DecayPipelineStep."] * 10000
+    runner = ParallelPipelineRunner(pipeline, chunk_size=500, seed=42)
+    results1 = runner.run(inputs)
+    results2 = runner.run(inputs)
+    print(f"Testing parallel runner\n{len(results1)} results, reproducible: {results1 == results2}")
+    print(results1[0])
+
 if __name__ == "__main__":
     check_decay_pipeline_step()